@@ -0,0 +1,63 @@
+"""Add last_execution_at and next_due_at columns to tasks
+
+Revision ID: 3f9c2d7a1b64
+Revises: 0bcb13197448
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2d7a1b64"
+down_revision: Union[str, None] = "0bcb13197448"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("last_execution_at", sa.DateTime(), nullable=True))
+    op.add_column("tasks", sa.Column("next_due_at", sa.DateTime(), nullable=True))
+
+    # 既存の実行履歴から最新実行日時をバックフィル
+    op.execute(
+        """
+        UPDATE tasks
+        SET last_execution_at = latest.last_execution
+        FROM (
+            SELECT task_id, max(execution_date) AS last_execution
+            FROM task_executions
+            GROUP BY task_id
+        ) AS latest
+        WHERE tasks.id = latest.task_id
+        """
+    )
+    # 次回実施予定日時 = 最新実行日時 + 頻度日数（未実行の場合は作成日時）
+    op.execute(
+        """
+        UPDATE tasks
+        SET next_due_at = CASE
+            WHEN last_execution_at IS NULL THEN COALESCE(created_at, now())
+            ELSE last_execution_at + frequency * INTERVAL '1 day'
+        END
+        """
+    )
+    # バックフィル後はモデル（Mapped[datetime]）と同じく NOT NULL にする
+    op.alter_column("tasks", "next_due_at", existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index(
+        "ix_tasks_project_id_next_due_at",
+        "tasks",
+        ["project_id", "next_due_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_project_id_next_due_at", table_name="tasks")
+    op.alter_column("tasks", "next_due_at", existing_type=sa.DateTime(), nullable=True)
+    op.drop_column("tasks", "next_due_at")
+    op.drop_column("tasks", "last_execution_at")
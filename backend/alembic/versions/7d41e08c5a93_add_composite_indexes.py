@@ -0,0 +1,50 @@
+"""Add composite indexes for project member, task execution lookups
+
+Revision ID: 7d41e08c5a93
+Revises: 3f9c2d7a1b64
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d41e08c5a93"
+down_revision: Union[str, None] = "3f9c2d7a1b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # メンバーシップ確認（全エンドポイント共通）
+    op.create_index(
+        "ix_project_members_project_id_user_id",
+        "project_members",
+        ["project_id", "user_id"],
+        unique=False,
+    )
+    # 参加プロジェクト一覧の取得
+    op.create_index(
+        "ix_project_members_user_id_project_id",
+        "project_members",
+        ["user_id", "project_id"],
+        unique=False,
+    )
+    # タスクごとの実行履歴・最新実行日時の取得
+    # tasks.project_id は ix_tasks_project_id_next_due_at の先頭列でカバーされる
+    op.create_index(
+        "ix_task_executions_task_id_execution_date",
+        "task_executions",
+        ["task_id", "execution_date"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_task_executions_task_id_execution_date", table_name="task_executions"
+    )
+    op.drop_index("ix_project_members_user_id_project_id", table_name="project_members")
+    op.drop_index("ix_project_members_project_id_user_id", table_name="project_members")
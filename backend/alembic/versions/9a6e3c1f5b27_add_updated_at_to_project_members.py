@@ -0,0 +1,35 @@
+"""Add updated_at column to project_members
+
+Revision ID: 9a6e3c1f5b27
+Revises: 7d41e08c5a93
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a6e3c1f5b27"
+down_revision: Union[str, None] = "7d41e08c5a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "project_members", sa.Column("updated_at", sa.DateTime(), nullable=True)
+    )
+    # 既存のメンバーは作成日時をバックフィル
+    op.execute("UPDATE project_members SET updated_at = COALESCE(created_at, now())")
+    # バックフィル後はモデル（Mapped[datetime]）と同じく NOT NULL にする
+    op.alter_column(
+        "project_members", "updated_at", existing_type=sa.DateTime(), nullable=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("project_members", "updated_at")
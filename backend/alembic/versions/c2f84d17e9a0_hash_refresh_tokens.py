@@ -0,0 +1,79 @@
+"""Store refresh tokens as SHA-256 hashes and add expiry indexes
+
+Revision ID: c2f84d17e9a0
+Revises: 9a6e3c1f5b27
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c2f84d17e9a0"
+down_revision: Union[str, None] = "9a6e3c1f5b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # refresh_tokens はこれまで Base.metadata.create_all でのみ作成されていたため、
+    # テーブルがない環境では作成し、ある環境ではトークンをハッシュに置き換える
+    if not sa.inspect(op.get_bind()).has_table("refresh_tokens"):
+        op.create_table(
+            "refresh_tokens",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("token_hash", sa.String(length=64), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            op.f("ix_refresh_tokens_id"), "refresh_tokens", ["id"], unique=False
+        )
+    else:
+        op.add_column(
+            "refresh_tokens",
+            sa.Column("token_hash", sa.String(length=64), nullable=True),
+        )
+        op.execute("DELETE FROM refresh_tokens WHERE expires_at <= now()")
+        op.execute(
+            "UPDATE refresh_tokens "
+            "SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')"
+        )
+        # token の一意インデックスは列とともに削除される
+        op.drop_column("refresh_tokens", "token")
+        op.alter_column("refresh_tokens", "token_hash", nullable=False)
+
+    op.create_index(
+        op.f("ix_refresh_tokens_token_hash"),
+        "refresh_tokens",
+        ["token_hash"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], unique=False
+    )
+    op.create_index(
+        "ix_refresh_tokens_user_id_expires_at",
+        "refresh_tokens",
+        ["user_id", "expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_user_id_expires_at", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
+    op.drop_index(op.f("ix_refresh_tokens_token_hash"), table_name="refresh_tokens")
+    # ハッシュから元のトークンは復元できないため、発行済みのトークンはすべて無効にする
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_column("refresh_tokens", "token_hash")
+    op.add_column("refresh_tokens", sa.Column("token", sa.String(), nullable=False))
+    op.create_index(
+        op.f("ix_refresh_tokens_token"), "refresh_tokens", ["token"], unique=True
+    )
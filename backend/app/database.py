@@ -1,29 +1,264 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+from uuid import uuid4
+
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from .pool_metrics import PoolMetrics, instrumented_pool_class
+from .settings import get_settings
 
-from .settings import settings
 
-# 環境変数に基づいてデータベースURLを選択
-if settings.environment == "production":
-    # 本番環境ではSupabaseのデータベースURLを使用
-    if not settings.supabase_database_url:
-        raise ValueError("SUPABASE_DATABASE_URL が設定されていません。環境変数を確認してください。")
-    database_url = settings.supabase_database_url
-else:
+@lru_cache
+def database_url() -> str:
+    """
+    環境に応じたデータベースURLを返します。
+    """
+    settings = get_settings()
+    if settings.environment == "production":
+        # 本番環境ではSupabaseのデータベースURLを使用
+        if not settings.supabase_database_url:
+            raise ValueError("SUPABASE_DATABASE_URL が設定されていません。環境変数を確認してください。")
+        return settings.supabase_database_url
     # 開発環境ではローカルのPostgreSQLを使用
     if not settings.local_database_url:
         raise ValueError("LOCAL_DATABASE_URL が設定されていません。環境変数または .env ファイルを確認してください。")
-    database_url = settings.local_database_url
+    return settings.local_database_url
+
+
+# 同期ドライバに対応する非同期ドライバ
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    同期ドライバのデータベースURLを非同期ドライバ（asyncpg）のURLに変換します。
+    asyncpg は sslmode を受け付けないため ssl に置き換えます。
+    """
+    sync_url = make_url(url)
+    async_url = sync_url.set(
+        drivername=ASYNC_DRIVERS.get(sync_url.drivername, sync_url.drivername)
+    )
+    if "sslmode" in async_url.query and async_url.drivername.endswith("asyncpg"):
+        query = dict(async_url.query)
+        query["ssl"] = query.pop("sslmode")
+        async_url = async_url.set(query=query)
+    return async_url.render_as_string(hide_password=False)
+
+
+def engine_options(base_pool: Type[Pool], metrics: PoolMetrics) -> Dict[str, Any]:
+    """
+    settings のコネクションプールの設定からエンジンの引数を生成します。
+    """
+    settings = get_settings()
+    if settings.db_pgbouncer:
+        # プールは PgBouncer に任せ、リクエストごとに接続する
+        return {"poolclass": instrumented_pool_class(NullPool, metrics)}
+    return {
+        "poolclass": instrumented_pool_class(base_pool, metrics),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def async_connect_args(url: str) -> Dict[str, Any]:
+    """
+    PgBouncer のトランザクションモードでは接続をまたいでプリペアドステートメントを
+    共有できないため、asyncpg のキャッシュを無効にし、名前が重複しないようにします。
+    """
+    if get_settings().db_pgbouncer and url.startswith("postgresql+asyncpg"):
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {}
+
+
+# コネクションプールの計測値（/metrics/pool で参照）
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+replica_pool_metrics = PoolMetrics("replica")
+
+
+@lru_cache
+def async_database_url() -> str:
+    return to_async_url(database_url())
+
+
+def replica_configured() -> bool:
+    return bool(get_settings().replica_database_url)
+
+
+class _Engines:
+    """
+    エンジンとセッションファクトリ。最初に使われた時点で作成します。
+    """
+
+    engine: Optional[Engine] = None
+    SessionLocal: Optional[sessionmaker] = None
+    async_engine: Optional[AsyncEngine] = None
+    AsyncSessionLocal: Optional[async_sessionmaker] = None
+    replica_async_engine: Optional[AsyncEngine] = None
+    ReplicaAsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+_engines = _Engines()
+
+
+def get_engine() -> Engine:
+    """
+    同期エンジンを返します（最初の呼び出しで作成。接続はクエリの実行時に行われます）。
+    """
+    if _engines.engine is None:
+        _engines.engine = create_engine(
+            database_url(), **engine_options(QueuePool, pool_metrics)
+        )
+        # セッションローカルの作成
+        _engines.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=_engines.engine
+        )
+    return _engines.engine
+
 
-DATABASE_URL = database_url
+def get_async_engine() -> AsyncEngine:
+    """
+    非同期エンジンを返します（ルーターはこちらを使用）。
+    """
+    if _engines.async_engine is None:
+        _engines.async_engine = create_async_engine(
+            async_database_url(),
+            connect_args=async_connect_args(async_database_url()),
+            **engine_options(AsyncAdaptedQueuePool, async_pool_metrics),
+        )
+        # 非同期セッションではコミット後の属性の遅延ロードができないため expire_on_commit を無効にする
+        _engines.AsyncSessionLocal = async_sessionmaker(
+            bind=_engines.async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _engines.async_engine
 
-# SQLAlchemyエンジンの作成
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-# セッションローカルの作成
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_replica_async_engine() -> AsyncEngine:
+    """
+    読み取り専用のレプリカの非同期エンジンを返します（settings.replica_database_url が必要）。
+    """
+    if _engines.replica_async_engine is None:
+        url = get_settings().replica_database_url
+        if not url:
+            raise ValueError("REPLICA_DATABASE_URL が設定されていません。環境変数を確認してください。")
+        async_url = to_async_url(url)
+        _engines.replica_async_engine = create_async_engine(
+            async_url,
+            connect_args=async_connect_args(async_url),
+            **engine_options(AsyncAdaptedQueuePool, replica_pool_metrics),
+        )
+        # info でレプリカのセッションかどうかを判別する（is_replica_session）
+        _engines.ReplicaAsyncSessionLocal = async_sessionmaker(
+            bind=_engines.replica_async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+            info={"replica": True},
+        )
+    return _engines.replica_async_engine
+
+
+def get_session_factory() -> sessionmaker:
+    get_engine()
+    return _engines.SessionLocal  # type: ignore[return-value]
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    get_async_engine()
+    return _engines.AsyncSessionLocal  # type: ignore[return-value]
+
+
+def get_replica_session_factory() -> async_sessionmaker:
+    get_replica_async_engine()
+    return _engines.ReplicaAsyncSessionLocal  # type: ignore[return-value]
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    return db.info.get("replica", False)
+
+
+def get_session_factory_for(db: AsyncSession) -> async_sessionmaker:
+    """
+    db と同じデータベース（プライマリまたはレプリカ）のセッションファクトリを返します。
+    """
+    if is_replica_session(db):
+        return get_replica_session_factory()
+    return get_async_session_factory()
+
+
+def _clear_engines() -> None:
+    _engines.engine = _engines.SessionLocal = None
+    _engines.async_engine = _engines.AsyncSessionLocal = None
+    _engines.replica_async_engine = _engines.ReplicaAsyncSessionLocal = None
+
+
+async def dispose_engines() -> None:
+    """
+    エンジンのコネクションプールを閉じます。以降に使われた場合は新しいエンジンを作成します。
+    """
+    engine = _engines.engine
+    async_engines = [_engines.async_engine, _engines.replica_async_engine]
+    _clear_engines()
+    for async_engine in async_engines:
+        if async_engine is not None:
+            await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+
+
+def reset_engines_after_fork() -> None:
+    """
+    フォークした子プロセスで呼び出し、親プロセスから引き継いだエンジンを破棄します。
+    引き継いだコネクションは親プロセスのものなので閉じずに参照だけを外し（close=False）、
+    子プロセスでは最初に使われた時点で新しいエンジンとコネクションプールを作成します。
+    """
+    engine = _engines.engine
+    async_engines = [_engines.async_engine, _engines.replica_async_engine]
+    _clear_engines()
+    for async_engine in async_engines:
+        if async_engine is not None:
+            async_engine.sync_engine.dispose(close=False)
+    if engine is not None:
+        engine.dispose(close=False)
+
+
+# 以前のモジュール変数（database.engine など）は参照された時点でエンジンを作成して返す
+_LAZY_ATTRIBUTES = {
+    "DATABASE_URL": database_url,
+    "ASYNC_DATABASE_URL": async_database_url,
+    "engine": get_engine,
+    "SessionLocal": get_session_factory,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # デクララティブベースの作成
 Base = declarative_base()
@@ -34,8 +269,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 def get_db():
     """データベースセッションを取得する依存関係"""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """非同期データベースセッションを取得する依存関係"""
+    async with get_async_session_factory()() as db:
+        yield db
@@ -0,0 +1,158 @@
+import threading
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from app import models, schemas
+from app.settings import get_settings
+
+
+class ProjectDueIndex:
+    """
+    1つのプロジェクトのタスクを次回実施予定日時順に保持するインデックス。
+    """
+
+    def __init__(self, built_at: float):
+        self.built_at = built_at
+        # (next_due_at, task_id) の昇順リスト
+        self._keys: list[tuple[datetime, int]] = []
+        self._entries: dict[int, tuple[datetime, schemas.TaskResponse]] = {}
+
+    def upsert(self, task: schemas.TaskResponse, next_due_at: Optional[datetime]):
+        self.remove(task.id)
+        # next_due_at が未設定のタスクはSQLでも対象外のため保持しない
+        if next_due_at is None:
+            return
+        insort(self._keys, (next_due_at, task.id))
+        self._entries[task.id] = (next_due_at, task)
+
+    def remove(self, task_id: int) -> None:
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return
+        key = (entry[0], task_id)
+        self._keys.pop(bisect_right(self._keys, key) - 1)
+
+    def due_until(self, target_end: datetime) -> List[schemas.TaskResponse]:
+        """
+        次回実施予定日時が target_end 以前のタスクをカテゴリ順で返します。
+        """
+        end = bisect_right(self._keys, (target_end, float("inf")))
+        due = [self._entries[task_id][1] for _, task_id in self._keys[:end]]
+        due.sort(key=lambda task: task.category)
+        return due
+
+
+class DueTaskIndex:
+    """
+    プロジェクトごとの実施予定タスクのインメモリインデックス。
+
+    最初のアクセス時にプロジェクトのタスクから構築し、タスクと実行履歴の
+    更新系エンドポイントから差分更新します。インデックスはプロセス内にのみ存在するため、
+    他のワーカーでの更新を取り込めるよう ttl_seconds 経過後に再構築します。
+    つまり複数ワーカーでは、他のワーカーでの更新が最大で ttl_seconds の間反映されません
+    （そのため gunicorn.conf.py では複数ワーカーの場合に既定で無効にしています）。
+    ttl_seconds が 0 の場合は無効となり、呼び出し側はSQLで実施予定タスクを取得します。
+    """
+
+    def __init__(self, ttl_seconds: int, max_projects: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._projects: OrderedDict[int, ProjectDueIndex] = OrderedDict()
+        # 構築中に更新が入った場合に古いデータで上書きしないための世代番号
+        self._generations: dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _get(self, project_id: int) -> Optional[ProjectDueIndex]:
+        index = self._projects.get(project_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.built_at > self.ttl_seconds:
+            del self._projects[project_id]
+            return None
+        self._projects.move_to_end(project_id)
+        return index
+
+    def due_tasks(
+        self, project_id: int, target_end: datetime
+    ) -> Optional[List[schemas.TaskResponse]]:
+        """
+        インデックスから実施予定タスクを取得します。未構築の場合は None を返します。
+        target_end はDBの日時と同じタイムゾーンなしのローカル時刻で指定します。
+        """
+        with self._lock:
+            index = self._get(project_id)
+            if index is None:
+                return None
+            return index.due_until(target_end)
+
+    def generation(self, project_id: int) -> int:
+        with self._lock:
+            return self._generations.get(project_id, 0)
+
+    def build(
+        self, project_id: int, tasks: Iterable[models.Task], generation: int
+    ) -> None:
+        """
+        プロジェクトのインデックスを構築します。
+        読み込み開始後に更新が入っていた場合（世代番号が変わっていた場合）は破棄します。
+        """
+        if not self.enabled:
+            return
+        index = ProjectDueIndex(built_at=time.monotonic())
+        for task in tasks:
+            index.upsert(schemas.TaskResponse.model_validate(task), task.next_due_at)
+        with self._lock:
+            if self._generations.get(project_id, 0) != generation:
+                return
+            self._projects[project_id] = index
+            self._projects.move_to_end(project_id)
+            while len(self._projects) > self.max_projects:
+                self._projects.popitem(last=False)
+
+    def _bump(self, project_id: int) -> None:
+        self._generations[project_id] = self._generations.get(project_id, 0) + 1
+
+    def upsert_task(self, task: models.Task) -> None:
+        """
+        タスクの作成・更新、実行履歴の変更をインデックスに反映します。
+        """
+        # ロック外でORMオブジェクトの属性を読み込んでおく
+        snapshot = schemas.TaskResponse.model_validate(task)
+        next_due_at = task.next_due_at
+        with self._lock:
+            self._bump(snapshot.project_id)
+            index = self._get(snapshot.project_id)
+            if index is not None:
+                index.upsert(snapshot, next_due_at)
+
+    def remove_task(self, project_id: int, task_id: int) -> None:
+        with self._lock:
+            self._bump(project_id)
+            index = self._get(project_id)
+            if index is not None:
+                index.remove(task_id)
+
+    def invalidate(self, project_id: int) -> None:
+        with self._lock:
+            self._bump(project_id)
+            self._projects.pop(project_id, None)
+
+
+@lru_cache
+def get_due_task_index() -> DueTaskIndex:
+    """
+    実施予定タスクのインデックスを返します（最初の呼び出しで作成）。
+    """
+    settings = get_settings()
+    return DueTaskIndex(
+        ttl_seconds=settings.due_task_index_ttl_seconds,
+        max_projects=settings.due_task_index_max_projects,
+    )
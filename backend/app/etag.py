@@ -0,0 +1,93 @@
+import hashlib
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+# ブラウザにキャッシュさせつつ、使う前に必ず If-None-Match で再検証させる
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts: object) -> str:
+    """
+    レスポンスの内容を決める値から強いETagを生成します。
+    """
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match ヘッダーに etag が含まれるかを返します（If-None-Match は弱い比較）。
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
+
+
+# 一覧のETagは行数・最大ID・最大更新日時の集計から求めるため、ORMオブジェクトを読み込まずに計算できます。
+# - 更新は updated_at、削除は行数、削除と追加が同時に起きた場合は最大IDの変化で検出します
+# - 一覧の取得より先に計算するため、間に更新が入っても古いETagに新しい内容が対応するだけで
+#   古い内容が新しいETagで返されることはありません
+
+
+async def tasks_etag(db: AsyncSession, project_id: int) -> str:
+    row = (
+        await db.execute(
+            select(
+                func.count(), func.max(models.Task.id), func.max(models.Task.updated_at)
+            ).where(models.Task.project_id == project_id)
+        )
+    ).one()
+    return compute_etag("tasks", project_id, *row)
+
+
+async def projects_etag(db: AsyncSession, user_id: int) -> str:
+    # 参加・脱退はメンバーのIDと行数で検出する
+    row = (
+        await db.execute(
+            select(
+                func.count(),
+                func.max(models.ProjectMember.id),
+                func.max(models.Project.updated_at),
+            )
+            .select_from(models.Project)
+            .join(models.ProjectMember)
+            .where(models.ProjectMember.user_id == user_id)
+        )
+    ).one()
+    return compute_etag("projects", user_id, *row)
+
+
+async def project_members_etag(db: AsyncSession, project_id: int) -> str:
+    # レスポンスにはユーザー情報も含まれるためユーザーの更新日時も使う
+    row = (
+        await db.execute(
+            select(
+                func.count(),
+                func.max(models.ProjectMember.id),
+                func.max(models.ProjectMember.updated_at),
+                func.max(models.User.updated_at),
+            )
+            .select_from(models.ProjectMember)
+            .join(models.User)
+            .where(models.ProjectMember.project_id == project_id)
+        )
+    ).one()
+    return compute_etag("project_members", project_id, *row)
@@ -1,51 +1,107 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+from typing import List
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from app.database import Base, engine
+from app.database import dispose_engines, replica_configured
+from app.read_replica import ReadYourWritesMiddleware, get_read_replica_router
+from app.refresh_tokens import run_refresh_token_purger
+from app.request_metrics import RequestMetricsMiddleware
 from app.routers import (
     auth,
     due_tasks,
     executions,
+    health,
+    metrics,
     project_members,
     projects,
     tasks,
     users,
 )
+from app.settings import get_settings
+from app.sql_instrumentation import SQLInstrumentationMiddleware
 
-# テーブルの作成
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # テーブルの作成・変更は Alembic のマイグレーション（alembic upgrade head）で行うため、
+    # 起動時にはDBに接続しない（エンジンは最初のクエリの実行時に作成される）
 
-# CORS設定 - 環境変数から読み込み
-cors_origins_env = os.getenv("CORS_ORIGINS", "")
-origins = []
+    # 期限切れのリフレッシュトークンをバックグラウンドで定期的に削除する
+    background_tasks = []
+    if get_settings().refresh_token_purge_interval_seconds > 0:
+        background_tasks.append(asyncio.create_task(run_refresh_token_purger()))
+    # レプリカの遅延を定期的に確認する（確認できるまで読み込みはプライマリで処理する）
+    if replica_configured():
+        background_tasks.append(
+            asyncio.create_task(get_read_replica_router().monitor())
+        )
+    yield
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    # コネクションプールを閉じる
+    await dispose_engines()
 
-# 環境変数からオリジンを追加（カンマ区切り）
-if cors_origins_env:
-    origins.extend([origin.strip() for origin in cors_origins_env.split(",")])
 
-# 開発環境用のオリジンを追加
-dev_origins = [
-    "http://localhost:80",
-]
-origins.extend(dev_origins)
+def cors_origins() -> List[str]:
+    # CORS設定 - 環境変数から読み込み
+    cors_origins_env = os.getenv("CORS_ORIGINS", "")
+    origins = []
+
+    # 環境変数からオリジンを追加（カンマ区切り）
+    if cors_origins_env:
+        origins.extend([origin.strip() for origin in cors_origins_env.split(",")])
+
+    # 開発環境用のオリジンを追加
+    dev_origins = [
+        "http://localhost:80",
+    ]
+    origins.extend(dev_origins)
+    return origins
+
+
+def create_app() -> FastAPI:
+    """
+    アプリケーションを生成します（uvicorn --factory app.main:create_app でも起動できます）。
+    """
+    # JSONのエンコードは標準の json より高速な orjson で行う
+    app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins(),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # リクエストごとのSQLの発行数と実行時間の集計
+    app.add_middleware(SQLInstrumentationMiddleware)
+    # 更新したユーザーの直後の読み込みをプライマリに向ける（レプリカの設定がない場合は何もしない）
+    app.add_middleware(ReadYourWritesMiddleware)
+    # ルートごとのリクエスト数・レイテンシの計測（/metrics で参照）
+    app.add_middleware(RequestMetricsMiddleware)
+
+    # ルーターのインクルード
+    app.include_router(auth.router)
+    app.include_router(users.router)
+    app.include_router(projects.router)
+    app.include_router(project_members.router)
+    app.include_router(due_tasks.router)
+    app.include_router(due_tasks.my_router)
+    app.include_router(executions.router)
+    app.include_router(tasks.router)
+    app.include_router(metrics.router)
+    app.include_router(health.router)
+    return app
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# ルーターのインクルード
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(projects.router)
-app.include_router(project_members.router)
-app.include_router(due_tasks.router)
-app.include_router(executions.router)
-app.include_router(tasks.router)
+app = create_app()
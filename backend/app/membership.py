@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, models, schemas, utils
+from app.cache import TTLCache
+from app.settings import get_settings
+
+
+@lru_cache
+def get_membership_cache() -> TTLCache[Tuple[int, int], schemas.ProjectMembership]:
+    """
+    (user_id, project_id) をキーとしたメンバーシップのキャッシュを返します（最初の呼び出しで作成）。
+    参加していないことはキャッシュしないため、メンバー追加は即座に反映されます。
+    他のワーカーでの変更（ロール変更・削除）は最大で TTL の間だけ古い情報が使われます。
+    """
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.membership_cache_max_entries,
+        ttl_seconds=settings.membership_cache_ttl_seconds,
+    )
+
+
+async def get_project_membership(
+    project_id: int,
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+) -> schemas.ProjectMembership:
+    """
+    現在のユーザーがプロジェクトのメンバーであることを確認し、メンバーシップを返す依存関係。
+    同じリクエスト内では1回だけ解決され、結果は TTL 付きでキャッシュされます。
+    """
+    membership_cache = get_membership_cache()
+    key = (current_user.id, project_id)
+    membership = membership_cache.get(key)
+    if membership is not None:
+        return membership
+
+    project_member = await db.scalar(
+        select(models.ProjectMember).where(
+            models.ProjectMember.project_id == project_id,
+            models.ProjectMember.user_id == current_user.id,
+        )
+    )
+    if not project_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
+        )
+
+    membership = schemas.ProjectMembership.model_validate(project_member)
+    membership_cache.set(key, membership)
+    return membership
+
+
+def invalidate_membership(user_id: int, project_id: int) -> None:
+    """
+    メンバーの追加・ロール変更・削除時にキャッシュを破棄します。
+    """
+    get_membership_cache().delete((user_id, project_id))
+
+
+def invalidate_project_memberships(project_id: int) -> None:
+    """
+    プロジェクト削除時に、そのプロジェクトのメンバーシップのキャッシュをすべて破棄します。
+    """
+    get_membership_cache().delete_where(lambda key: key[1] == project_id)
@@ -0,0 +1,89 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+# レイテンシ計測用のヒストグラムの既定のバケット（秒）
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    値の分布を固定のバケットごとに数えるヒストグラム（スレッドセーフ）。
+
+    バケットは上限値（le）で表し、snapshot では Prometheus と同じく
+    上限値以下の観測数を累積して返します。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # 最後の要素は最大のバケットを超えた観測数（+Inf）
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts[:-1], strict=True):
+            running += count
+            cumulative[repr(bound)] = running
+        running += counts[-1]
+        cumulative["+Inf"] = running
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """
+    Prometheus のテキスト形式のラベル（{name="value",...}）を生成します。
+    """
+    if not labels:
+        return ""
+    pairs = (f'{name}="{escape_label_value(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    return f"{name}{format_labels(labels)} {value}"
+
+
+def format_histogram(
+    name: str, labels: Dict[str, str], snapshot: Dict[str, object]
+) -> List[str]:
+    """
+    Histogram.snapshot() の結果を Prometheus のヒストグラムの行（_bucket, _sum, _count）に変換します。
+    """
+    lines = [
+        format_sample(f"{name}_bucket", {**labels, "le": bound}, count)
+        for bound, count in snapshot["buckets"].items()  # type: ignore[union-attr]
+    ]
+    lines.append(format_sample(f"{name}_sum", labels, snapshot["sum"]))  # type: ignore[arg-type]
+    lines.append(format_sample(f"{name}_count", labels, snapshot["count"]))  # type: ignore[arg-type]
+    return lines
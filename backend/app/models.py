@@ -1,7 +1,7 @@
-import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -27,11 +27,19 @@ class Project(Base):
 
 class ProjectMember(Base):
     __tablename__ = "project_members"
+    __table_args__ = (
+        # メンバーシップ確認 (project_id, user_id) と参加プロジェクト一覧 (user_id) 用
+        Index("ix_project_members_project_id_user_id", "project_id", "user_id"),
+        Index("ix_project_members_user_id_project_id", "user_id", "project_id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     project_id: Mapped[int] = mapped_column(Integer, ForeignKey("projects.id"))
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
     role: Mapped[str] = mapped_column(String, default="member")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
 
     project = relationship("Project", back_populates="members")
     user = relationship("User", back_populates="memberships")
@@ -39,11 +47,21 @@ class ProjectMember(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # 実施予定タスクの検索を (project_id, next_due_at) の範囲スキャンで行う
+        Index("ix_tasks_project_id_next_due_at", "project_id", "next_due_at"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     project_id: Mapped[int] = mapped_column(Integer, ForeignKey("projects.id"))
     category: Mapped[str] = mapped_column(String)
     task_name: Mapped[str] = mapped_column(String)
     frequency: Mapped[int] = mapped_column(Integer)
+    # 最新の実行日時（未実行の場合はNone）
+    last_execution_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+    # 次回実施予定日時（未実行のタスクは作成時点で実施が必要）
+    next_due_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now, onupdate=datetime.now
@@ -54,9 +72,23 @@ class Task(Base):
         "TaskExecution", back_populates="task", cascade="all, delete-orphan"
     )
 
+    def set_last_execution(self, last_execution_at: Optional[datetime]) -> None:
+        """
+        最新の実行日時を設定し、頻度から次回実施予定日時を再計算します。
+        """
+        self.last_execution_at = last_execution_at
+        if last_execution_at is None:
+            self.next_due_at = self.created_at or datetime.now()
+        else:
+            self.next_due_at = last_execution_at + timedelta(days=self.frequency)
+
 
 class TaskExecution(Base):
     __tablename__ = "task_executions"
+    __table_args__ = (
+        # タスクごとの実行履歴・最新実行日時の取得用
+        Index("ix_task_executions_task_id_execution_date", "task_id", "execution_date"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"))
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
@@ -86,14 +118,16 @@ class User(Base):
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # 期限切れトークンの削除 (expires_at) とユーザーごとのトークン数の制限 (user_id, expires_at) 用
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index("ix_refresh_tokens_user_id_expires_at", "user_id", "expires_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    token: Mapped[str] = mapped_column(
-        String,
-        unique=True,
-        index=True,
-        nullable=False,
-        default=lambda: str(uuid.uuid4()),
+    # トークンそのものではなく SHA-256 のハッシュ（16進数64文字）を保存する
+    token_hash: Mapped[str] = mapped_column(
+        String(64), unique=True, index=True, nullable=False
     )
     user_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=False
@@ -0,0 +1,85 @@
+import time
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+import anyio
+from passlib.context import CryptContext
+
+from app.metrics import Histogram, format_histogram, format_sample
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    パスワードのハッシュ化・検証（bcrypt）を専用の同時実行数の上限付きでスレッドで実行します。
+
+    リクエスト処理用のスレッドプール（AnyIO の既定のリミッター）とは別のリミッターを使うため、
+    ログインが集中しても他のスレッド処理の空きを奪いません。
+    上限を超えた呼び出しは順番を待ち、その待ち時間と処理時間をヒストグラムに記録します。
+    """
+
+    def __init__(self, context: CryptContext, workers: int):
+        self.context = context
+        self.limiter = anyio.CapacityLimiter(workers)
+        self.wait_seconds = Histogram()
+        self.run_seconds = Histogram()
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        queued_at = time.perf_counter()
+
+        def timed() -> T:
+            started_at = time.perf_counter()
+            self.wait_seconds.observe(started_at - queued_at)
+            try:
+                return func(*args)
+            finally:
+                self.run_seconds.observe(time.perf_counter() - started_at)
+
+        return await anyio.to_thread.run_sync(timed, limiter=self.limiter)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        パスワードを検証し、(一致したか, 再ハッシュした値) を返します。
+        ハッシュのコストが現在の設定と異なる場合のみ再ハッシュした値を返します（それ以外は None）。
+        """
+        return await self._run(
+            self.context.verify_and_update, password, hashed_password
+        )
+
+    def render(self) -> List[str]:
+        """
+        Prometheus のテキスト形式の行を返します。
+        """
+        statistics = self.limiter.statistics()
+        lines = [
+            "# HELP password_hash_workers Maximum number of concurrent password hashes.",
+            "# TYPE password_hash_workers gauge",
+            format_sample("password_hash_workers", {}, statistics.total_tokens),
+            "# HELP password_hash_in_progress Password hashes currently running.",
+            "# TYPE password_hash_in_progress gauge",
+            format_sample("password_hash_in_progress", {}, statistics.borrowed_tokens),
+            "# HELP password_hash_waiting Password hashes waiting for a worker.",
+            "# TYPE password_hash_waiting gauge",
+            format_sample("password_hash_waiting", {}, statistics.tasks_waiting),
+            "# HELP password_hash_wait_seconds Time spent waiting for a worker.",
+            "# TYPE password_hash_wait_seconds histogram",
+        ]
+        lines += format_histogram(
+            "password_hash_wait_seconds", {}, self.wait_seconds.snapshot()
+        )
+        lines += [
+            "# HELP password_hash_duration_seconds Time spent hashing or verifying.",
+            "# TYPE password_hash_duration_seconds histogram",
+        ]
+        lines += format_histogram(
+            "password_hash_duration_seconds", {}, self.run_seconds.snapshot()
+        )
+        return lines
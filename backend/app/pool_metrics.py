@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Dict, Optional, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+from app.metrics import Histogram
+
+
+class PoolMetrics:
+    """
+    コネクションプールの計測値。
+
+    - wait: プールから空きコネクションを得るまで（新規接続を含む）の待ち時間
+    - checkout: チェックアウト全体（待ち時間・pre-ping・リセットを含む）の所要時間
+    チェックアウト中・オーバーフロー中のコネクション数はスナップショット取得時にプールから読み取ります。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[Pool] = None
+        self.wait_seconds = Histogram()
+        self.checkout_seconds = Histogram()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def record_checkout(self, elapsed: float) -> None:
+        self.checkout_seconds.observe(elapsed)
+        with self._lock:
+            self.checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        pool = self.pool
+        # NullPool などコネクションを保持しないプールは数を持たない
+        gauges = {
+            name: getattr(pool, name)() if hasattr(pool, name) else None
+            for name in ("size", "checkedin", "checkedout", "overflow")
+        }
+        # QueuePool.overflow() はプールが埋まるまで負の値を返すため0未満は0とする
+        if gauges["overflow"] is not None:
+            gauges["overflow"] = max(gauges["overflow"], 0)
+        return {
+            "pool": type(pool).__name__ if pool is not None else None,
+            **gauges,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_seconds.snapshot(),
+            "checkout_seconds": self.checkout_seconds.snapshot(),
+        }
+
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    チェックアウトの所要時間と待ち時間を metrics に記録するプールクラスを生成します。
+    engine.dispose() でプールが作り直されても同じクラスが使われるため計測は継続します。
+    """
+
+    class InstrumentedPool(base):  # type: ignore[valid-type, misc]
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            metrics.pool = self
+
+        def connect(self):
+            started = time.perf_counter()
+            connection = super().connect()
+            metrics.record_checkout(time.perf_counter() - started)
+            return connection
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_timeout()
+                raise
+            finally:
+                metrics.wait_seconds.observe(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    InstrumentedPool.__qualname__ = InstrumentedPool.__name__
+    return InstrumentedPool
@@ -0,0 +1,46 @@
+import logging
+
+from fastapi import Request
+
+from app import sql_instrumentation
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudget:
+    """
+    エンドポイントで発行されるSQLの数が上限を超えていないかを確認する依存関係。
+
+    N+1 クエリの再発を検知するためのもので、上限を超えた場合は警告ログを出力し、
+    settings.query_budget_enforce が有効な場合（開発環境の既定）はエラーにします。
+
+    使い方:
+        @router.get("/", dependencies=[Depends(QueryBudget(3))])
+    """
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+
+    async def __call__(self, request: Request):
+        # 通常は SQLInstrumentationMiddleware がリクエストの集計を開始している
+        stats = sql_instrumentation.current_stats()
+        token = None
+        if stats is None:
+            stats, token = sql_instrumentation.start_stats()
+        baseline = stats.statements
+        try:
+            yield
+        finally:
+            if token is not None:
+                sql_instrumentation.reset_stats(token)
+
+        issued = stats.statements - baseline
+        if issued > self.max_statements:
+            message = (
+                f"{request.method} {request.url.path} issued {issued} SQL statements "
+                f"(budget: {self.max_statements})"
+            )
+            logger.warning(message)
+            if get_settings().query_budget_enforce:
+                raise AssertionError(message)
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Depends, Request
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import database, utils
+from app.cache import TTLCache
+from app.metrics import format_sample
+from app.response_cache import get_response_cache
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# レプリカで処理してよいメソッド
+READ_METHODS = {"GET", "HEAD"}
+
+# レプリカの遅延（秒）。WALをすべて適用済みの場合と、レプリカではない場合
+# （ローカルで代わりに使う単独のPostgreSQLなど）は 0 とする
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def token_user_id(authorization: Optional[str]) -> Optional[int]:
+    """
+    Authorization ヘッダーのアクセストークンからユーザーIDを取得します（無効な場合は None）。
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(
+            authorization[7:], get_settings().secret_key, algorithms=[utils.ALGORITHM]
+        )
+        return int(payload["sub"])
+    except (JWTError, KeyError, ValueError):
+        return None
+
+
+class ReadReplicaRouter:
+    """
+    読み込みをプライマリとレプリカのどちらで処理するかを決めます。
+
+    以下のすべてを満たす場合にレプリカを使います。
+    - GET / HEAD のリクエスト
+    - レプリカの遅延が max_lag_seconds 以内（monitor が check_interval_seconds ごとに確認）
+    - リクエストのユーザーが read_your_writes_seconds 以内に更新していない
+    更新したユーザーの記録はワーカーごとのため、別のワーカーで更新した直後の読み込みは
+    最大で max_lag_seconds だけ古い内容になることがあります。
+    """
+
+    def __init__(
+        self,
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        read_your_writes_seconds: float,
+        max_users: int,
+    ):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.recent_writers: TTLCache[int, bool] = TTLCache(
+            max_users, read_your_writes_seconds
+        )
+        self.lag_seconds: Optional[float] = None
+        self._usable_until = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def replica_usable(self) -> bool:
+        # 確認が途絶えた場合（monitor の停止など）もプライマリに戻す
+        return time.monotonic() < self._usable_until
+
+    def record_write(self, user_id: int) -> None:
+        self.recent_writers.set(user_id, True)
+
+    def use_replica(self, request: Request) -> bool:
+        if request.method not in READ_METHODS or not self.replica_usable:
+            return False
+        user_id = token_user_id(request.headers.get("authorization"))
+        return user_id is None or self.recent_writers.get(user_id) is None
+
+    async def check_lag(self) -> None:
+        """
+        レプリカの遅延を確認し、許容範囲内であれば次の確認までレプリカを使えるようにします。
+        遅延の確認に max_lag_seconds 以上かかる場合も使えないものとします。
+        """
+        try:
+            async with asyncio.timeout(self.max_lag_seconds):
+                async with database.get_replica_async_engine().connect() as connection:
+                    if connection.dialect.name == "postgresql":
+                        lag = (await connection.execute(REPLICA_LAG_SQL)).scalar_one()
+                    else:
+                        # PostgreSQL 以外（ローカルの SQLite など）は接続の確認のみ
+                        await connection.execute(text("SELECT 1"))
+                        lag = 0
+            self.lag_seconds = float(lag)
+        except Exception:
+            logger.warning("replica lag check failed", exc_info=True)
+            self.lag_seconds = None
+            self._usable_until = 0.0
+            return
+        if self.lag_seconds > self.max_lag_seconds:
+            self._usable_until = 0.0
+            return
+        # 次の確認が少し遅れても切り替わらないよう、間隔の2倍の間は有効とする
+        self._usable_until = time.monotonic() + self.check_interval_seconds * 2
+
+    async def monitor(self) -> None:
+        """
+        check_interval_seconds ごとにレプリカの遅延を確認し続けます。
+        アプリケーションの起動時にバックグラウンドタスクとして開始します。
+        """
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval_seconds)
+
+    def render(self) -> List[str]:
+        """
+        Prometheus のテキスト形式の行を返します。
+        """
+        lines = [
+            "# HELP db_read_requests_total Read sessions by database.",
+            "# TYPE db_read_requests_total counter",
+            format_sample(
+                "db_read_requests_total", {"target": "replica"}, self.replica_reads
+            ),
+            format_sample(
+                "db_read_requests_total", {"target": "primary"}, self.primary_reads
+            ),
+        ]
+        if self.lag_seconds is not None:
+            lines += [
+                "# HELP db_replica_lag_seconds Replication lag of the read replica.",
+                "# TYPE db_replica_lag_seconds gauge",
+                format_sample("db_replica_lag_seconds", {}, self.lag_seconds),
+            ]
+        return lines
+
+
+@lru_cache
+def get_read_replica_router() -> ReadReplicaRouter:
+    """
+    設定に応じた ReadReplicaRouter を返します（最初の呼び出しで作成）。
+    """
+    settings = get_settings()
+    return ReadReplicaRouter(
+        max_lag_seconds=settings.replica_max_lag_seconds,
+        check_interval_seconds=settings.replica_lag_check_interval_seconds,
+        read_your_writes_seconds=settings.replica_read_your_writes_seconds,
+        max_users=settings.replica_read_your_writes_max_users,
+    )
+
+
+def replica_session(use_replica: bool) -> Optional[AsyncSession]:
+    """
+    レプリカを使う場合はレプリカのセッションを、使わない場合は None を返します
+    （呼び出し側はリクエストのプライマリのセッションを使います）。
+    """
+    read_replica_router = get_read_replica_router()
+    if not use_replica:
+        read_replica_router.primary_reads += 1
+        return None
+    read_replica_router.replica_reads += 1
+    return database.get_replica_session_factory()()
+
+
+async def get_read_db(
+    request: Request, primary: AsyncSession = Depends(database.get_async_db)
+) -> AsyncIterator[AsyncSession]:
+    """
+    読み込み専用のエンドポイント用の非同期データベースセッションを取得する依存関係。
+    レプリカを使える場合はレプリカのセッションを返します。
+    プライマリのセッションは認証などの依存関係と同じ database.get_async_db のものを使うため、
+    dependency_overrides による差し替えも有効です。
+    """
+    replica = replica_session(get_read_replica_router().use_replica(request))
+    if replica is None:
+        yield primary
+        return
+    async with replica as db:
+        yield db
+
+
+async def get_cache_fill_db(
+    request: Request, primary: AsyncSession = Depends(database.get_async_db)
+) -> AsyncIterator[AsyncSession]:
+    """
+    レスポンスキャッシュに保存する一覧用のセッションを取得する依存関係。
+
+    更新による無効化の直後に遅延したレプリカから読むと、古い内容が新しい世代番号で
+    キャッシュされて TTL の間返され続けるため、キャッシュが有効な場合はプライマリから読みます
+    （キャッシュのミスは無効化と期限切れの後だけのため、プライマリへの負荷は小さい）。
+    """
+    replica = replica_session(
+        not get_response_cache().enabled
+        and get_read_replica_router().use_replica(request)
+    )
+    if replica is None:
+        yield primary
+        return
+    async with replica as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """
+    更新系のリクエスト（GET / HEAD / OPTIONS 以外）が成功したユーザーを記録し、
+    その後しばらくの読み込みをプライマリで処理させるミドルウェア。
+    レプリカが設定されていない場合は何もしません。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in READ_METHODS | {"OPTIONS"}
+            or not database.replica_configured()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                user_id = token_user_id(Headers(scope=scope).get("authorization"))
+                if user_id is not None:
+                    get_read_replica_router().record_write(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
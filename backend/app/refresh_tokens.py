@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, desc, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, models
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# リフレッシュトークンの有効期間
+REFRESH_TOKEN_EXPIRE = timedelta(days=3)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    リフレッシュトークンを保存・検索に使う固定長のハッシュ（SHA-256 の16進数64文字）に変換します。
+    トークンは推測できない乱数（jti）を含むため、ソルトなしのハッシュで十分です。
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def find_refresh_token(
+    db: AsyncSession, token: str
+) -> Optional[models.RefreshToken]:
+    """
+    有効期限内のリフレッシュトークンを取得します。
+    """
+    return await db.scalar(
+        select(models.RefreshToken).where(
+            models.RefreshToken.token_hash == hash_refresh_token(token),
+            models.RefreshToken.expires_at > datetime.now(),
+        )
+    )
+
+
+async def store_refresh_token(db: AsyncSession, user_id: int, token: str) -> None:
+    """
+    リフレッシュトークンを保存し、ユーザーの期限切れのトークンと、
+    settings.refresh_token_max_per_user を超えた古いトークンを削除します（コミットは呼び出し側）。
+    """
+    db.add(
+        models.RefreshToken(
+            token_hash=hash_refresh_token(token),
+            user_id=user_id,
+            expires_at=datetime.now() + REFRESH_TOKEN_EXPIRE,
+        )
+    )
+    await db.flush()
+
+    max_per_user = get_settings().refresh_token_max_per_user
+    conditions = [models.RefreshToken.expires_at <= datetime.now()]
+    if max_per_user > 0:
+        # 有効期限の遅い（新しい）順に上限件数を残す
+        conditions.append(
+            models.RefreshToken.id.in_(
+                select(models.RefreshToken.id)
+                .where(models.RefreshToken.user_id == user_id)
+                .order_by(
+                    desc(models.RefreshToken.expires_at), desc(models.RefreshToken.id)
+                )
+                .offset(max_per_user)
+            )
+        )
+    await db.execute(
+        delete(models.RefreshToken).where(
+            models.RefreshToken.user_id == user_id, or_(*conditions)
+        )
+    )
+
+
+async def purge_expired_refresh_tokens(batch_size: int) -> int:
+    """
+    期限切れのリフレッシュトークンを batch_size 件ずつ削除し、削除した件数を返します。
+    1回のトランザクションで削除する件数を抑え、ロックとWALの増加を小さくします。
+    複数のワーカーが同時に実行しても、ロック済みの行は飛ばすため待ち合わせません。
+    """
+    purged = 0
+    while True:
+        async with database.AsyncSessionLocal() as db:
+            expired = (
+                select(models.RefreshToken.id)
+                .where(models.RefreshToken.expires_at <= datetime.now())
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                delete(models.RefreshToken).where(models.RefreshToken.id.in_(expired))
+            )
+            await db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+        # 他のリクエストの処理を妨げないよう、バッチの間でイベントループに制御を返す
+        await asyncio.sleep(0)
+
+
+async def run_refresh_token_purger() -> None:
+    """
+    settings.refresh_token_purge_interval_seconds ごとに期限切れのリフレッシュトークンを削除し続けます。
+    アプリケーションの起動時にバックグラウンドタスクとして開始します。
+    """
+    settings = get_settings()
+    interval = settings.refresh_token_purge_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            purged = await purge_expired_refresh_tokens(
+                settings.refresh_token_purge_batch_size
+            )
+        except Exception:
+            logger.exception("refresh token purge failed")
+            continue
+        if purged:
+            logger.info("purged %d expired refresh tokens", purged)
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import Histogram, format_histogram, format_sample
+
+# どのルートにも一致しなかったリクエストのラベル（パスをそのまま使うとラベルが際限なく増えるため）
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetrics:
+    """
+    HTTPリクエストの計測値（スレッドセーフ）。
+    レイテンシはメソッド・ルートのテンプレート・ステータスコードごとのヒストグラムで保持し、
+    そのサンプル数をリクエスト数とします。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, elapsed: float) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram()
+        histogram.observe(elapsed)
+
+    def render(self) -> List[str]:
+        """
+        Prometheus のテキスト形式の行を返します。
+        """
+        with self._lock:
+            latency = sorted(self._latency.items())
+            in_flight = self.in_flight
+
+        snapshots = [
+            ({"method": method, "route": route, "status": status}, histogram.snapshot())
+            for (method, route, status), histogram in latency
+        ]
+        lines = [
+            "# HELP http_requests_total Total number of HTTP requests.",
+            "# TYPE http_requests_total counter",
+        ]
+        lines.extend(
+            format_sample("http_requests_total", labels, snapshot["count"])  # type: ignore[arg-type]
+            for labels, snapshot in snapshots
+        )
+        lines.extend(
+            [
+                "# HELP http_requests_in_flight Number of HTTP requests being processed.",
+                "# TYPE http_requests_in_flight gauge",
+                format_sample("http_requests_in_flight", {}, in_flight),
+                "# HELP http_request_duration_seconds HTTP request latency.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+        )
+        for labels, snapshot in snapshots:
+            lines.extend(
+                format_histogram("http_request_duration_seconds", labels, snapshot)
+            )
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    リクエスト数・処理中のリクエスト数・レイテンシを記録するミドルウェア。
+    ルートのラベルには実際のパスではなく /projects/{project_id}/tasks/due/ のような
+    ルートのテンプレートを使います。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        request_metrics.started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # ルーティング後は一致したルートが scope に設定されている
+            route = scope.get("route")
+            request_metrics.finished(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - started,
+            )
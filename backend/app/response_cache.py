@@ -0,0 +1,286 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Protocol, Set, Tuple
+
+from fastapi import Request, Response
+
+from app.etag import etag_matches, not_modified, set_etag
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# キャッシュするリソース（プロジェクトごとに無効化する単位）
+TASKS = "tasks"
+MEMBERS = "members"
+DUE_TASKS = "due_tasks"
+
+
+class ResponseCacheBackend(Protocol):
+    """
+    シリアライズ済みのレスポンスを保存するストア。
+
+    エントリは名前空間（リソースとプロジェクト）とバリアント（クエリパラメータ）で識別し、
+    無効化は名前空間単位で行います。無効化のたびに名前空間の世代番号が進み、
+    set は取得時（get）の世代番号から変わっていない場合にのみ保存します。
+    これにより、読み込み中に更新が入った古い内容でキャッシュを上書きしません。
+    """
+
+    async def get(self, namespace: str, variant: str) -> Tuple[Optional[bytes], int]:
+        """
+        (保存されている値, 名前空間の世代番号) を返します。
+        """
+        ...
+
+    async def set(
+        self, namespace: str, variant: str, value: bytes, generation: int
+    ) -> None: ...
+
+    async def invalidate(self, namespace: str) -> None: ...
+
+
+class MemoryResponseCache:
+    """
+    プロセス内のストア（スレッドセーフ）。
+
+    値の合計サイズが max_bytes を超えた場合は最も長く参照されていないエントリから削除します。
+    他のワーカーでの無効化は届かないため、ttl_seconds で古い内容が使われる期間を制限します。
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, bytes]] = OrderedDict()
+        self._variants: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self.size = 0
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        _, value = self._entries.pop(key)
+        self.size -= len(value)
+        variants = self._variants[key[0]]
+        variants.discard(key[1])
+        if not variants:
+            del self._variants[key[0]]
+
+    async def get(self, namespace: str, variant: str) -> Tuple[Optional[bytes], int]:
+        key = (namespace, variant)
+        with self._lock:
+            generation = self._generations.get(namespace, 0)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, generation
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None, generation
+            self._entries.move_to_end(key)
+            return value, generation
+
+    async def set(
+        self, namespace: str, variant: str, value: bytes, generation: int
+    ) -> None:
+        # 1件で上限を超える値は保存しない
+        if len(value) > self.max_bytes:
+            return
+        key = (namespace, variant)
+        with self._lock:
+            if self._generations.get(namespace, 0) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._variants.setdefault(namespace, set()).add(variant)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for variant in list(self._variants.get(namespace, ())):
+                self._remove((namespace, variant))
+
+
+# 世代番号が取得時から変わっていない場合にのみ保存する
+_REDIS_SET_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+"""
+
+
+class RedisResponseCache:
+    """
+    Redis 互換のサーバーを使うストア（ワーカー間で共有され、無効化も即座に反映されます）。
+
+    名前空間ごとにバリアントをフィールドとするハッシュに保存し、無効化はハッシュの削除で行います。
+    メモリの上限とLRUによる削除はサーバー側の設定（maxmemory, maxmemory-policy allkeys-lru）に従います。
+    サーバーに接続できない場合はキャッシュなしで動作を続けます。redis パッケージが必要です。
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "response_cache"):
+        try:
+            from redis import asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as e:
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis には redis パッケージが必要です"
+            ) from e
+        self._errors = (RedisError, OSError)
+        self._client = redis.from_url(url)
+        self._set_script = self._client.register_script(_REDIS_SET_SCRIPT)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _keys(self, namespace: str) -> Tuple[str, str]:
+        # 世代番号のキーは期限を設けない（プロジェクトごとに1つの小さな値）
+        return (
+            f"{self.prefix}:generation:{namespace}",
+            f"{self.prefix}:entries:{namespace}",
+        )
+
+    async def get(self, namespace: str, variant: str) -> Tuple[Optional[bytes], int]:
+        generation_key, entries_key = self._keys(namespace)
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.get(generation_key)
+                pipe.hget(entries_key, variant)
+                generation, value = await pipe.execute()
+        except self._errors:
+            logger.warning("response cache get failed", exc_info=True)
+            # 保存されないよう存在しない世代番号を返す
+            return None, -1
+        return value, int(generation or 0)
+
+    async def set(
+        self, namespace: str, variant: str, value: bytes, generation: int
+    ) -> None:
+        if generation < 0:
+            return
+        try:
+            await self._set_script(
+                keys=list(self._keys(namespace)),
+                args=[generation, variant, value, self.ttl_seconds],
+            )
+        except self._errors:
+            logger.warning("response cache set failed", exc_info=True)
+
+    async def invalidate(self, namespace: str) -> None:
+        generation_key, entries_key = self._keys(namespace)
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.incr(generation_key)
+                pipe.delete(entries_key)
+                await pipe.execute()
+        except self._errors:
+            # 無効化できなかった内容は TTL の経過で破棄される
+            logger.warning("response cache invalidate failed", exc_info=True)
+
+
+class ResponseCache:
+    """
+    プロジェクト単位のGETレスポンスのリードスルーキャッシュ。
+
+    Pydantic でシリアライズ済みのJSONをETagとともに保存し、ヒットした場合は
+    DBへの問い合わせとシリアライズを省略します。
+    更新系エンドポイントは対応するリソースを invalidate で無効化します。
+    """
+
+    def __init__(self, backend: Optional[ResponseCacheBackend]):
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def namespace(resource: str, project_id: int) -> str:
+        return f"{resource}:{project_id}"
+
+    async def get(
+        self, resource: str, project_id: int, variant: str = ""
+    ) -> Tuple[Optional[Tuple[bytes, Optional[str]]], int]:
+        """
+        ((本文, ETag) または None, 世代番号) を返します。
+        """
+        if self.backend is None:
+            return None, -1
+        value, generation = await self.backend.get(
+            self.namespace(resource, project_id), variant
+        )
+        if value is None:
+            return None, generation
+        # 保存形式: ETag（なければ空）と改行に続けて本文
+        etag, _, body = value.partition(b"\n")
+        return (body, etag.decode("ascii") or None), generation
+
+    async def set(
+        self,
+        resource: str,
+        project_id: int,
+        variant: str,
+        generation: int,
+        body: bytes,
+        etag: Optional[str] = None,
+    ) -> None:
+        if self.backend is None:
+            return
+        value = (etag or "").encode("ascii") + b"\n" + body
+        await self.backend.set(
+            self.namespace(resource, project_id), variant, value, generation
+        )
+
+    async def invalidate(self, project_id: int, *resources: str) -> None:
+        if self.backend is None:
+            return
+        for resource in resources:
+            await self.backend.invalidate(self.namespace(resource, project_id))
+
+
+def create_backend() -> Optional[ResponseCacheBackend]:
+    settings = get_settings()
+    if settings.response_cache_ttl_seconds <= 0:
+        return None
+    if settings.response_cache_backend == "memory":
+        return MemoryResponseCache(
+            max_bytes=settings.response_cache_max_bytes,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+        )
+    if settings.response_cache_backend == "redis":
+        if not settings.response_cache_redis_url:
+            raise ValueError(
+                "RESPONSE_CACHE_REDIS_URL が設定されていません。環境変数を確認してください。"
+            )
+        return RedisResponseCache(
+            settings.response_cache_redis_url, settings.response_cache_ttl_seconds
+        )
+    if settings.response_cache_backend == "none":
+        return None
+    raise ValueError(
+        f"RESPONSE_CACHE_BACKEND の値が不正です: {settings.response_cache_backend}"
+    )
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    """
+    設定に応じたバックエンドのレスポンスキャッシュを返します（最初の呼び出しで作成）。
+    """
+    return ResponseCache(create_backend())
+
+
+def cached_response(request: Request, body: bytes, etag: Optional[str]) -> Response:
+    """
+    シリアライズ済みのJSONからレスポンスを生成します（ETagが一致する場合は 304）。
+    """
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag)
+    response = Response(content=body, media_type="application/json")
+    if etag is not None:
+        set_etag(response, etag)
+    return response
@@ -1,13 +1,14 @@
-from datetime import datetime, timedelta
-
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models import RefreshToken, User
+from app.database import get_async_db
+from app.models import ProjectMember, RefreshToken, User
+from app.refresh_tokens import hash_refresh_token, store_refresh_token
+from app.response_cache import MEMBERS, get_response_cache
 from app.schemas import (
+    CurrentUser,
     PasswordChange,
     RefreshTokenRequest,
     Token,
@@ -16,11 +17,13 @@ from app.schemas import (
     UserUpdate,
 )
 from app.utils import (
+    access_token_claims,
     authenticate_user,
     create_access_token,
     create_refresh_token,
     get_current_user,
     hash_password,
+    invalidate_user_cache,
     refresh_access_token,
     verify_password,
 )
@@ -30,53 +33,44 @@ router = APIRouter(
     tags=["Authentication"],
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 @router.post("/register/", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     新しいユーザーを登録します。
     """
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="メールアドレスが既に存在します")
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password(user.password)
     new_user = User(
         username=user.username, email=user.email, password_hash=hashed_password
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
 @router.post("/login/", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     ユーザーを認証し、アクセストークンを発行します。
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-    if not verify_password(form_data.password, user.password_hash):
-        raise HTTPException(status_code=400, detail="パスワードが正しくありません")
 
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data=access_token_claims(user))
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
 
-    # リフレッシュトークンをデータベースに保存
-    new_refresh_token = RefreshToken(
-        token=refresh_token,
-        user_id=user.id,
-        expires_at=datetime.now() + timedelta(days=3),
-    )
-    db.add(new_refresh_token)
-    db.commit()
+    # リフレッシュトークンをデータベースに保存（再ハッシュしたパスワードもあわせてコミットされる）
+    await store_refresh_token(db, user.id, refresh_token)
+    await db.commit()
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -85,15 +79,15 @@ def login(
 
 
 @router.post("/refresh/", response_model=Token)
-def refresh_token_endpoint(
-    refresh_token: RefreshTokenRequest, db: Session = Depends(get_db)
+async def refresh_token_endpoint(
+    refresh_token: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)
 ):
-    return refresh_access_token(refresh_token)
+    return await refresh_access_token(refresh_token, db)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def get_current_user_info(
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     ログイン中のユーザーの情報を返します。
@@ -102,50 +96,62 @@ def get_current_user_info(
 
 
 @router.put("/update-profile")
-def update_profile(
+async def update_profile(
     update_data: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     ユーザーのプロフィールを更新します。
     """
+    user = await db.get_one(User, current_user.id)
     if update_data.username:
-        current_user.username = update_data.username
+        user.username = update_data.username
     if update_data.email:
-        current_user.email = update_data.email
-
-    db.add(current_user)
-    db.commit()
+        user.email = update_data.email
+
+    await db.commit()
+    invalidate_user_cache(user.id)
+    # メンバー一覧にはユーザー名とメールアドレスが含まれる
+    response_cache = get_response_cache()
+    if response_cache.enabled:
+        project_ids = await db.scalars(
+            select(ProjectMember.project_id).where(ProjectMember.user_id == user.id)
+        )
+        for project_id in project_ids:
+            await response_cache.invalidate(project_id, MEMBERS)
     return {"msg": "プロフィールが更新されました。"}
 
 
 @router.put("/change-password")
-def change_password(
+async def change_password(
     change_data: PasswordChange,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     パスワードを変更します。
     """
-    if not pwd_context.verify(change_data.current_password, current_user.password_hash):
+    user = await db.get_one(User, current_user.id)
+    if not await verify_password(change_data.current_password, user.password_hash):
         raise HTTPException(status_code=400, detail="現在のパスワードが正しくありません。")
 
-    current_user.password_hash = pwd_context.hash(change_data.new_password)
-    db.add(current_user)
-    db.commit()
+    user.password_hash = await hash_password(change_data.new_password)
+    await db.commit()
+    invalidate_user_cache(user.id)
     return {"msg": "パスワードが変更されました。"}
 
 
 @router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT)
-def logout(refresh_token: RefreshTokenRequest, db: Session = Depends(get_db)):
-    stored_token = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token == refresh_token.refresh_token)
-        .first()
+async def logout(
+    refresh_token: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)
+):
+    stored_token = await db.scalar(
+        select(RefreshToken).where(
+            RefreshToken.token_hash == hash_refresh_token(refresh_token.refresh_token)
+        )
     )
     if stored_token:
-        db.delete(stored_token)
-        db.commit()
+        await db.delete(stored_token)
+        await db.commit()
     return
@@ -2,15 +2,20 @@
 
 from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import List, Optional
+from itertools import groupby
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, literal, or_
-from sqlalchemy.orm import Session
-from sqlalchemy.types import Interval
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from zoneinfo import ZoneInfo  # 追加: ZoneInfoをインポート
 
 from app import database, models, schemas, utils
+from app.due_task_index import get_due_task_index
+from app.membership import get_project_membership
+from app.read_replica import get_cache_fill_db, get_read_db
+from app.response_cache import DUE_TASKS, cached_response, get_response_cache
 
 
 # 追加: フィルタータイプの定義
@@ -26,84 +31,45 @@ router = APIRouter(
     tags=["DueTasks"],
 )
 
+# 参加しているすべてのプロジェクトを横断して取得するルーター
+my_router = APIRouter(
+    prefix="/tasks/due",
+    tags=["DueTasks"],
+)
+
+task_list_adapter = TypeAdapter(List[schemas.TaskResponse])
+
 
-def due_tasks(
-    db: Session, project_id: int, target_start: datetime, target_end: datetime
+async def due_tasks(
+    db: AsyncSession, project_id: int, target_start: datetime, target_end: datetime
 ):
     """
     実施が必要なタスクの一覧を取得します。
-    実施が必要なタスクとは、前回実施日 + 頻度日数が target_start から target_end の範囲内にあるタスク。
+    実施が必要なタスクとは、次回実施予定日時（前回実施日 + 頻度日数）が target_end 以前のタスク。
+    未実行のタスクは作成時点の日時が次回実施予定日時となるため、常に対象に含まれます。
     """
-    # サブクエリで各タスクの最新実行日を取得
-    subquery = (
-        db.query(
-            models.TaskExecution.task_id,
-            func.max(models.TaskExecution.execution_date).label("last_execution"),
-        )
-        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
-        .filter(models.Task.project_id == project_id)
-        .group_by(models.TaskExecution.task_id)
-        .subquery()
-    )
-
-    # INTERVAL '1 day' を表現
-    interval_one_day = literal("1 day").cast(Interval())
-
-    # 実施が必要なタスクをフィルタリング
+    # next_due_at はタイムゾーンなしのローカル時刻のため、同じ形に揃えて比較する
+    target_end = utils.to_naive_local(target_end)
+    # (project_id, next_due_at) インデックスの範囲スキャンで絞り込む
     due_tasks_query = (
-        db.query(models.Task)
-        .filter(models.Task.project_id == project_id)
-        .outerjoin(subquery, models.Task.id == subquery.c.task_id)
-        .filter(
-            or_(
-                subquery.c.last_execution == None,  # noqa: E711
-                # and_(
-                # frequencyがInteger型の場合、INTERVAL '1 day' * frequency として加算
-                # subquery.c.last_execution
-                # + (interval_one_day * models.Task.frequency)
-                # >= target_start,
-                subquery.c.last_execution + (interval_one_day * models.Task.frequency)
-                <= target_end,
-                # ),
-            )
+        select(models.Task)
+        .where(
+            models.Task.project_id == project_id,
+            models.Task.next_due_at <= target_end,
         )
         .order_by(models.Task.category)
     )
 
-    print(due_tasks_query.statement.compile(compile_kwargs={"literal_binds": True}))
-    due_tasks = due_tasks_query.all()
+    due_tasks = (await db.scalars(due_tasks_query)).all()
 
     return due_tasks
 
 
-@router.get("/", response_model=List[schemas.TaskResponse])
-def get_due_tasks(
-    project_id: int,
-    filter_type: Optional[FilterType] = Query(
-        None, description="Filter by time period"
-    ),
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
-):
+def get_target_range(filter_type: Optional[FilterType]) -> Tuple[datetime, datetime]:
     """
-    指定されたプロジェクト内の実施が必要なタスクを取得します。
-    フィルタを指定することで期間を絞り込むことができます。
+    FilterTypeに応じた対象期間（UTC）を返します。
+    期間はJSTの今日の開始から、フィルタに応じた日数後のJSTの終了までです。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
     # JSTタイムゾーンの定義
     jst = ZoneInfo("Asia/Tokyo")
 
@@ -146,5 +112,114 @@ def get_due_tasks(
         target_start = utc_today_start
         target_end = utc_today_end
 
-    tasks = due_tasks(db, project_id, target_start, target_end)
+    return target_start, target_end
+
+
+async def load_due_tasks(
+    db: AsyncSession, project_id: int, target_start: datetime, target_end: datetime
+):
+    """
+    インメモリインデックスから実施予定タスクを取得し、未構築の場合はプロジェクトのタスクから構築します。
+    遅延したレプリカの内容でインデックスを構築しないよう、レプリカのセッションでは構築しません。
+    """
+    # インデックスの next_due_at と比較できるようタイムゾーンなしのローカル時刻に揃える
+    target_end = utils.to_naive_local(target_end)
+    index = get_due_task_index()
+    if not index.enabled or database.is_replica_session(db):
+        return await due_tasks(db, project_id, target_start, target_end)
+
+    tasks = index.due_tasks(project_id, target_end)
+    if tasks is None:
+        generation = index.generation(project_id)
+        project_tasks = (
+            await db.scalars(
+                select(models.Task).where(models.Task.project_id == project_id)
+            )
+        ).all()
+        index.build(project_id, project_tasks, generation)
+        tasks = index.due_tasks(project_id, target_end)
+        if tasks is None:
+            # 構築中に更新が入った場合はSQLで取得する
+            tasks = await due_tasks(db, project_id, target_start, target_end)
     return tasks
+
+
+@router.get("/", response_model=List[schemas.TaskResponse])
+async def get_due_tasks(
+    project_id: int,
+    request: Request,
+    filter_type: Optional[FilterType] = Query(
+        None, description="Filter by time period"
+    ),
+    db: AsyncSession = Depends(get_cache_fill_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
+):
+    """
+    指定されたプロジェクト内の実施が必要なタスクを取得します。
+    フィルタを指定することで期間を絞り込むことができます。
+    """
+    target_start, target_end = get_target_range(filter_type)
+
+    # 対象期間の終了日時は日付が変わるまで同じため、フィルタと日付ごとにキャッシュする
+    variant = target_end.isoformat()
+    response_cache = get_response_cache()
+    cached, generation = await response_cache.get(DUE_TASKS, project_id, variant)
+    if cached is not None:
+        return cached_response(request, *cached)
+
+    tasks = await load_due_tasks(db, project_id, target_start, target_end)
+    body = task_list_adapter.dump_json(
+        task_list_adapter.validate_python(tasks, from_attributes=True)
+    )
+    await response_cache.set(DUE_TASKS, project_id, variant, generation, body)
+    return cached_response(request, body, None)
+
+
+@my_router.get("/", response_model=List[schemas.ProjectDueTasksResponse])
+async def get_my_due_tasks(
+    filter_type: Optional[FilterType] = Query(
+        None, description="Filter by time period"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+):
+    """
+    現在のユーザーが参加しているすべてのプロジェクトの実施が必要なタスクを、
+    プロジェクトごとにまとめて取得します。
+    メンバーシップの確認を兼ねて project_members を結合した1回のクエリで取得します。
+    """
+    _, target_end = get_target_range(filter_type)
+    target_end = utils.to_naive_local(target_end)
+
+    rows = (
+        await db.execute(
+            select(models.Task, models.Project.name)
+            .join(
+                models.ProjectMember,
+                models.ProjectMember.project_id == models.Task.project_id,
+            )
+            .join(models.Project, models.Project.id == models.Task.project_id)
+            .where(
+                models.ProjectMember.user_id == current_user.id,
+                models.Task.next_due_at <= target_end,
+            )
+            .order_by(models.Task.project_id, models.Task.category)
+        )
+    ).all()
+
+    # プロジェクトごとにまとめる（クエリはproject_id順に並んでいる）
+    response: List[schemas.ProjectDueTasksResponse] = []
+    for project_id, group in groupby(rows, key=lambda row: row[0].project_id):
+        project_rows = list(group)
+        response.append(
+            schemas.ProjectDueTasksResponse(
+                project_id=project_id,
+                project_name=project_rows[0][1],
+                tasks=[
+                    schemas.TaskResponse.model_validate(task)
+                    for task, _ in project_rows
+                ],
+            )
+        )
+    return response
@@ -1,91 +1,357 @@
 # app/routers/executions.py
 
-from datetime import date
-from typing import List, Optional
+import base64
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Select, desc, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import contains_eager
 
 from app import database, models, schemas, utils
+from app.due_task_index import get_due_task_index
+from app.membership import get_project_membership
+from app.query_budget import QueryBudget
+from app.read_replica import get_read_db
+from app.response_cache import DUE_TASKS, TASKS, get_response_cache
+from app.serialization import row_dicts
 
 router = APIRouter(
     prefix="/projects/{project_id}/executions",
     tags=["Executions"],
 )
 
+# 実行履歴一覧の1ページあたりの件数
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+# ストリーミング時にサーバーサイドカーソルから一度に読み出す件数
+STREAM_BATCH_SIZE = 500
+
+
+async def refresh_task_schedule(db: AsyncSession, task: models.Task) -> None:
+    """
+    タスクの実行履歴から最新実行日時を再取得し、次回実施予定日時を更新します。
+    実行履歴の更新・削除で最新実行日時が変わる可能性がある場合に使用します。
+    """
+    last_execution_at = await db.scalar(
+        select(func.max(models.TaskExecution.execution_date)).where(
+            models.TaskExecution.task_id == task.id
+        )
+    )
+    task.set_last_execution(last_execution_at)
+
+
+@router.post(
+    "/batch",
+    response_model=schemas.TaskExecutionBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(8))],
+)
+async def create_executions_batch(
+    project_id: int,
+    batch: schemas.TaskExecutionBatchCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
+):
+    """
+    実行したタスクをまとめて登録します。
+    タスクと実施者はそれぞれ1回のクエリでまとめて確認し、問題のない項目を
+    1つのトランザクションで登録します。問題のある項目は登録せず、位置とエラー内容を返します。
+    実行日時を省略した項目は現在日時で登録します。
+    件数の上限（schemas.BATCH_MAX_ITEMS）はリクエストの検証時に確認します。
+    """
+    task_ids = {item.task_id for item in batch.items}
+    user_ids = {item.user_id for item in batch.items}
+    tasks = {
+        task.id: task
+        for task in await db.scalars(
+            select(models.Task).where(
+                models.Task.project_id == project_id, models.Task.id.in_(task_ids)
+            )
+        )
+    }
+    member_ids = set(
+        await db.scalars(
+            select(models.ProjectMember.user_id).where(
+                models.ProjectMember.project_id == project_id,
+                models.ProjectMember.user_id.in_(user_ids),
+            )
+        )
+    )
+
+    now = datetime.now()
+    values = []
+    errors: List[schemas.TaskExecutionBatchError] = []
+    for index, item in enumerate(batch.items):
+        if item.task_id not in tasks:
+            message = "タスクが見つかりません"
+        elif item.user_id not in member_ids:
+            message = "指定された実施者はこのプロジェクトのメンバーではありません"
+        else:
+            execution_date = utils.to_naive_local(item.execution_date or now)
+            values.append(
+                {
+                    "task_id": item.task_id,
+                    "user_id": item.user_id,
+                    "execution_date": execution_date,
+                    "created_at": now,
+                }
+            )
+            continue
+        errors.append(schemas.TaskExecutionBatchError(index=index, message=message))
+
+    created: List[models.TaskExecution] = []
+    if values:
+        # 複数行の INSERT ... RETURNING でまとめて登録する
+        created = list(
+            await db.scalars(
+                insert(models.TaskExecution).returning(models.TaskExecution), values
+            )
+        )
+
+        # タスクごとの最新実行日時が進んだ場合のみ次回実施予定日時を更新する
+        latest: Dict[int, datetime] = {}
+        for value in values:
+            task_id = value["task_id"]
+            if task_id not in latest or latest[task_id] < value["execution_date"]:
+                latest[task_id] = value["execution_date"]
+        updated_tasks = []
+        for task_id, execution_date in latest.items():
+            task = tasks[task_id]
+            if (
+                task.last_execution_at is None
+                or task.last_execution_at < execution_date
+            ):
+                task.set_last_execution(execution_date)
+                updated_tasks.append(task)
+
+        await db.commit()
+        for task in updated_tasks:
+            get_due_task_index().upsert_task(task)
+        if updated_tasks:
+            await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
+
+    return schemas.TaskExecutionBatchResponse(
+        created=[
+            schemas.TaskExecutionCreateResponse.model_validate(execution)
+            for execution in created
+        ],
+        errors=errors,
+    )
+
 
 @router.post(
     "/{task_id}",
     response_model=schemas.TaskExecutionCreateResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(7))],
 )
-def create_execution(
+async def create_execution(
     project_id: int,
     task_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     実行したタスクを登録します
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    # 他のプロジェクトのタスクは見つからないものとして扱う
+    task = await db.scalar(
+        select(models.Task).where(
+            models.Task.id == task_id, models.Task.project_id == project_id
         )
-        .first()
     )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="タスクが見つかりません")
 
+    execution_date = datetime.now()
     new_task_execute = models.TaskExecution(
         task_id=task_id,
         user_id=current_user.id,
+        execution_date=execution_date,
     )
     db.add(new_task_execute)
-    db.commit()
-    db.refresh(new_task_execute)
+
+    # 最新実行日時より新しい場合のみ次回実施予定日時を進める
+    if task.last_execution_at is None or task.last_execution_at < execution_date:
+        task.set_last_execution(execution_date)
+    await db.commit()
+    await db.refresh(new_task_execute)
+    get_due_task_index().upsert_task(task)
+    # 次回実施予定日時の変更はタスクの一覧と実施予定タスクに反映される
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
 
     return new_task_execute
 
 
-@router.get("/", response_model=List[schemas.TaskExecutionResponse])
-def get_executions(
+def encode_cursor(execution_date: datetime, execution_id: int) -> str:
+    """
+    キーセットページネーション用のカーソル（最後に返した行の実行日時とID）を生成します。
+    """
+    raw = json.dumps([execution_date.isoformat(), execution_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        execution_date, execution_id = json.loads(raw)
+        return datetime.fromisoformat(execution_date), int(execution_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="カーソルが不正です。"
+        )
+
+
+def execution_response_query() -> Select:
+    """
+    タスク実行履歴のレスポンスに必要な列を、タスクと実施者を結合して1回のクエリで取得します。
+    ORMオブジェクトのリレーションを遅延ロードしないため、件数によらず発行SQLは1回です。
+    行はそのまま TaskExecutionResponse のJSONとして返せるよう、列をスキーマと同じ順序で並べています。
+    """
+    return (
+        select(
+            models.TaskExecution.task_id,
+            models.TaskExecution.user_id,
+            models.TaskExecution.id,
+            models.Task.category,
+            models.Task.task_name,
+            models.User.username.label("user_name"),
+            models.TaskExecution.execution_date,
+            models.TaskExecution.created_at,
+        )
+        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
+        .join(models.User, models.User.id == models.TaskExecution.user_id)
+    )
+
+
+async def stream_executions(
+    session_factory: async_sessionmaker,
+    project_id: int,
+    startDate: Optional[date],
+    endDate: Optional[date],
+) -> AsyncIterator[bytes]:
+    """
+    タスク実行履歴をサーバーサイドカーソルで少しずつ読み出し、NDJSONとして返します。
+    レスポンス送信中もセッションを使うため、リクエストのセッションとは別に
+    （リクエストと同じプライマリまたはレプリカで）開きます。
+    """
+    async with session_factory() as db:
+        query = execution_response_query().where(models.Task.project_id == project_id)
+        if startDate:
+            query = query.where(models.TaskExecution.execution_date >= startDate)
+        if endDate:
+            query = query.where(models.TaskExecution.execution_date <= endDate)
+
+        rows = await db.stream(
+            query.order_by(
+                desc(models.TaskExecution.execution_date),
+                desc(models.TaskExecution.id),
+            ).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+
+        async for row in rows:
+            yield orjson.dumps(dict(zip(row._fields, row, strict=True))) + b"\n"
+
+
+@router.get(
+    "/",
+    response_model=schemas.TaskExecutionPageResponse,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def get_executions(
     project_id: int,
     startDate: Optional[date] = Query(None, alias="startDate"),
     endDate: Optional[date] = Query(None, alias="endDate"),
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = Query(False, description="全件をNDJSONでストリーミングする"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
-    指定されたプロジェクト内のタスク実行履歴を取得します。
+    指定されたプロジェクト内のタスク実行履歴を、実行日時の新しい順に取得します。
     期間を指定することも可能です。
+    結果は limit 件ずつ返し、続きは next_cursor を cursor に指定して取得します。
+    stream を指定した場合は全件をNDJSON形式でストリーミングします。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    # 日付範囲のバリデーション
+    if startDate and endDate and startDate > endDate:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="開始日は終了日より前の日付にしてください。",
         )
-        .first()
-    )
 
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
+    if stream:
+        return StreamingResponse(
+            stream_executions(
+                database.get_session_factory_for(db), project_id, startDate, endDate
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    # ベースクエリの作成
+    query = execution_response_query().where(models.Task.project_id == project_id)
+
+    # クエリパラメータに基づくフィルタリング
+    if startDate:
+        query = query.where(models.TaskExecution.execution_date >= startDate)
+    if endDate:
+        query = query.where(models.TaskExecution.execution_date <= endDate)
+
+    # カーソル（前ページの最後の行）より後ろの行のみ取得
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.TaskExecution.execution_date, models.TaskExecution.id)
+            < tuple_(cursor_date, cursor_id)
+        )
+
+    # 実行日順に並べ替え、次ページの有無を判定するため1件多く取得
+    executions = (
+        await db.execute(
+            query.order_by(
+                desc(models.TaskExecution.execution_date),
+                desc(models.TaskExecution.id),
+            ).limit(limit + 1)
         )
+    ).all()
+    next_cursor = None
+    if len(executions) > limit:
+        executions = executions[:limit]
+        last = executions[-1]
+        next_cursor = encode_cursor(last.execution_date, last.id)
+
+    # 行をスキーマに変換せずそのままJSONにする（response_model による再検証も行わない）
+    return ORJSONResponse(
+        {"items": row_dicts(executions), "next_cursor": next_cursor}
+    )
+
 
+@router.get(
+    "/summary",
+    response_model=schemas.TaskExecutionSummaryResponse,
+    dependencies=[Depends(QueryBudget(4))],
+)
+async def get_execution_summary(
+    project_id: int,
+    startDate: Optional[date] = Query(None, alias="startDate"),
+    endDate: Optional[date] = Query(None, alias="endDate"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
+):
+    """
+    指定されたプロジェクト内のタスク実行数を、実施者ごと・カテゴリごとに集計して取得します。
+    期間の指定方法は実行履歴の一覧取得と同じです。
+    """
     # 日付範囲のバリデーション
     if startDate and endDate and startDate > endDate:
         raise HTTPException(
@@ -93,212 +359,188 @@ def get_executions(
             detail="開始日は終了日より前の日付にしてください。",
         )
 
-    # ベースクエリの作成
-    query = (
-        db.query(models.TaskExecution)
-        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
-        .filter(models.Task.project_id == project_id)
-    )
-
-    # クエリパラメータに基づくフィルタリング
+    # 対象期間の実行履歴の絞り込み条件
+    conditions = [models.Task.project_id == project_id]
     if startDate:
-        query = query.filter(models.TaskExecution.execution_date >= startDate)
+        conditions.append(models.TaskExecution.execution_date >= startDate)
     if endDate:
-        query = query.filter(models.TaskExecution.execution_date <= endDate)
-
-    # 実行日順に並べ替え
-    executions = query.order_by(desc(models.TaskExecution.execution_date)).all()
-
-    # スキーマに変換（タスク名と実施者名を含める）
-    execution_responses = [
-        schemas.TaskExecutionResponse(
-            id=exec.id,
-            task_id=exec.task_id,
-            category=exec.task.category,
-            task_name=exec.task.task_name,
-            user_id=exec.user_id,
-            user_name=exec.user.username,
-            execution_date=exec.execution_date,
-            created_at=exec.created_at,
+        conditions.append(models.TaskExecution.execution_date <= endDate)
+
+    execution_count = func.count(models.TaskExecution.id).label("count")
+
+    # 実施者ごとの実行数
+    by_user = (
+        await db.execute(
+            select(models.TaskExecution.user_id, models.User.username, execution_count)
+            .select_from(models.TaskExecution)
+            .join(models.Task, models.Task.id == models.TaskExecution.task_id)
+            .join(models.User, models.User.id == models.TaskExecution.user_id)
+            .where(*conditions)
+            .group_by(models.TaskExecution.user_id, models.User.username)
+            .order_by(desc(execution_count))
+        )
+    ).all()
+
+    # カテゴリごとの実行数
+    by_category = (
+        await db.execute(
+            select(models.Task.category, execution_count)
+            .select_from(models.TaskExecution)
+            .join(models.Task, models.Task.id == models.TaskExecution.task_id)
+            .where(*conditions)
+            .group_by(models.Task.category)
+            .order_by(desc(execution_count))
         )
-        for exec in executions
-    ]
-    return execution_responses
+    ).all()
+
+    return schemas.TaskExecutionSummaryResponse(
+        total=sum(row.count for row in by_user),
+        by_user=[
+            schemas.TaskExecutionCountByUser(
+                user_id=row.user_id, user_name=row.username, count=row.count
+            )
+            for row in by_user
+        ],
+        by_category=[
+            schemas.TaskExecutionCountByCategory(
+                category=row.category, count=row.count
+            )
+            for row in by_category
+        ],
+    )
 
 
 @router.get(
     "/{execution_id}",
     response_model=schemas.TaskExecutionResponse,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
 )
-def get_execution(
+async def get_execution(
     project_id: int,
     execution_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     特定のタスク実行履歴を取得します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
     execution = (
-        db.query(models.TaskExecution)
-        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
-        .filter(
-            models.Task.project_id == project_id,
-            models.TaskExecution.id == execution_id,
+        await db.execute(
+            execution_response_query().where(
+                models.Task.project_id == project_id,
+                models.TaskExecution.id == execution_id,
+            )
         )
-        .first()
-    )
+    ).first()
 
     if not execution:
         raise HTTPException(status_code=404, detail="タスク実行履歴が見つかりません")
 
-    execution_response = schemas.TaskExecutionResponse(
-        id=execution.id,
-        task_id=execution.task_id,
-        category=execution.task.category,
-        task_name=execution.task.task_name,
-        user_id=execution.user_id,
-        user_name=execution.user.username,  # executor のリレーションを仮定
-        execution_date=execution.execution_date,
-        created_at=execution.created_at,
-    )
-
-    return execution_response
+    return ORJSONResponse(row_dicts([execution])[0])
 
 
 @router.put(
     "/{execution_id}",
     response_model=schemas.TaskExecutionResponse,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(10))],
 )
-def update_execution(
+async def update_execution(
     project_id: int,
     execution_id: int,
     execution_update: schemas.TaskExecutionUpdate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     タスク実行履歴を更新します。
     タスク名は変更できず、実行者と実行日時のみ更新可能です。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    # 次回実施予定日時の更新に使うタスクも同時に読み込む
+    execution = await db.scalar(
+        select(models.TaskExecution)
+        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
+        .options(contains_eager(models.TaskExecution.task))
+        .where(
+            models.Task.project_id == project_id,
+            models.TaskExecution.id == execution_id,
         )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
-    execution = (
-        db.query(models.TaskExecution)
-        .filter(models.TaskExecution.id == execution_id)
-        .first()
     )
     if not execution:
         raise HTTPException(status_code=404, detail="タスク実行履歴が見つかりません")
 
     # 実行者がプロジェクトメンバーであることを確認
-    new_executor = (
-        db.query(models.User).filter(models.User.id == execution_update.user_id).first()
-    )
+    new_executor = await db.get(models.User, execution_update.user_id)
     if not new_executor:
         raise HTTPException(status_code=404, detail="指定された実施者が見つかりません")
-    project_member = (
-        db.query(models.ProjectMember)
-        .filter(
+    project_member = await db.scalar(
+        select(models.ProjectMember).where(
             models.ProjectMember.project_id == project_id,
             models.ProjectMember.user_id == execution_update.user_id,
         )
-        .first()
     )
     if not project_member:
         raise HTTPException(status_code=400, detail="指定された実施者はこのプロジェクトのメンバーではありません")
 
     # 実行履歴を更新
+    task = execution.task
     if execution_update.user_id is not None:
         execution.user_id = execution_update.user_id
     if execution_update.execution_date is not None:
-        execution.execution_date = execution_update.execution_date
-
-    db.commit()
-    db.refresh(execution)
-
-    # スキーマに変換
-    execution_response = schemas.TaskExecutionResponse(
-        id=execution.id,
-        task_id=execution.task_id,
-        category=execution.task.category,
-        task_name=execution.task.task_name,
-        user_id=execution.user_id,
-        user_name=execution.user.username,
-        execution_date=execution.execution_date,
-        created_at=execution.created_at,
-    )
-
-    return execution_response
+        execution.execution_date = utils.to_naive_local(execution_update.execution_date)
+        await db.flush()
+        await refresh_task_schedule(db, task)
+
+    await db.commit()
+    get_due_task_index().upsert_task(task)
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
+
+    # 更新後の内容をタスク名・実施者名とあわせて取得
+    updated = (
+        await db.execute(
+            execution_response_query().where(models.TaskExecution.id == execution_id)
+        )
+    ).one()
+    return ORJSONResponse(row_dicts([updated])[0])
 
 
 @router.delete(
     "/{execution_id}",
     status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(7))],
 )
-def delete_execution(
+async def delete_execution(
     project_id: int,
     execution_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     タスク実行履歴を削除します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
+    # 次回実施予定日時の更新に使うタスクも同時に読み込む
+    execution = await db.scalar(
+        select(models.TaskExecution)
+        .join(models.Task, models.Task.id == models.TaskExecution.task_id)
+        .options(contains_eager(models.TaskExecution.task))
+        .where(
+            models.Task.project_id == project_id,
+            models.TaskExecution.id == execution_id,
         )
-
-    execution = (
-        db.query(models.TaskExecution)
-        .filter(models.TaskExecution.id == execution_id)
-        .first()
     )
     if not execution:
         raise HTTPException(status_code=404, detail="タスク実行履歴が見つかりません")
 
-    db.delete(execution)
-    db.commit()
+    task = execution.task
+    await db.delete(execution)
+    await db.flush()
+    await refresh_task_schedule(db, task)
+    await db.commit()
+    get_due_task_index().upsert_task(task)
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
 
     return
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Header, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+
+from app import database, utils
+from app.settings import get_settings
+
+# オーケストレーターのプローブ用（OpenAPI のスキーマには含めない）
+router = APIRouter(tags=["Health"], include_in_schema=False)
+
+
+def pool_status() -> Dict[str, Any]:
+    """
+    非同期エンジンのコネクションプールの使用状況（saturation は上限に対する使用中の割合）。
+    """
+    snapshot = database.async_pool_metrics.snapshot()
+    checked_out = snapshot["checkedout"]
+    if checked_out is None:
+        # PgBouncer 利用時（NullPool）はアプリ側でプールしない
+        return {"pool": snapshot["pool"]}
+    settings = get_settings()
+    capacity = settings.db_pool_size + settings.db_max_overflow
+    return {
+        "pool": snapshot["pool"],
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+        "timeouts": snapshot["timeouts"],
+    }
+
+
+class ReadinessCheck:
+    """
+    DBへの接続確認の結果を ttl_seconds の間キャッシュします。
+
+    複数のオーケストレーターから同時にプローブが来ても、確認は同時に1つだけ実行し、
+    待っていたプローブは同じ結果を返します。プールの空きを待つ時間も timeout_seconds に含まれます。
+    """
+
+    def __init__(self, ttl_seconds: float, timeout_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._lock = asyncio.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+
+    async def _check_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout_seconds):
+                async with database.get_async_engine().connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+        except TimeoutError:
+            return {"ok": False, "error": f"timed out after {self.timeout_seconds}s"}
+        except Exception as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {
+            "ok": True,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def get(self) -> Dict[str, Any]:
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return {**self._result, "cached": True}
+        async with self._lock:
+            # ロックを待つ間に他のプローブが確認した場合はその結果を使う
+            if self._result is None or time.monotonic() >= self._expires_at:
+                database_status = await self._check_database()
+                self._result = {
+                    "status": "ok" if database_status["ok"] else "unavailable",
+                    "checked_at": datetime.now(timezone.utc).isoformat(),
+                    "database": database_status,
+                    "pool": pool_status(),
+                }
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                return {**self._result, "cached": False}
+        return {**self._result, "cached": True}
+
+
+@lru_cache
+def get_readiness_check() -> ReadinessCheck:
+    """
+    設定に応じた ReadinessCheck を返します（最初の呼び出しで作成）。
+    """
+    settings = get_settings()
+    return ReadinessCheck(
+        ttl_seconds=settings.readiness_cache_seconds,
+        timeout_seconds=settings.readiness_timeout_seconds,
+    )
+
+
+@router.get("/healthz")
+async def healthz():
+    """
+    プロセスが応答できることだけを確認します（DBには接続しません）。
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(authorization: Optional[str] = Header(None)):
+    """
+    DBに接続できるかを確認します。接続できない場合は 503 を返します。
+    DBの確認結果とコネクションプールの使用状況は内部の情報のため、
+    /metrics を参照できるリクエスト（settings.metrics_token）にのみ返します。
+    """
+    result = await get_readiness_check().get()
+    status_code = (
+        status.HTTP_200_OK
+        if result["status"] == "ok"
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    if not utils.metrics_authorized(authorization):
+        result = {"status": result["status"]}
+    return ORJSONResponse(result, status_code=status_code)
@@ -0,0 +1,114 @@
+from typing import List
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import database, utils
+from app.metrics import format_histogram, format_sample
+from app.pool_metrics import PoolMetrics
+from app.read_replica import get_read_replica_router
+from app.request_metrics import request_metrics
+
+# 内部の状態を含むため、settings.metrics_token で参照を制限する
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(utils.require_metrics_token)],
+)
+
+# Prometheus のテキスト形式のContent-Type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+POOL_GAUGES = {
+    "size": "Configured size of the connection pool.",
+    "checkedin": "Idle connections in the pool.",
+    "checkedout": "Connections currently checked out.",
+    "overflow": "Connections opened beyond the pool size.",
+}
+
+
+def pool_lines(pools: List[PoolMetrics]) -> List[str]:
+    snapshots = [(pool.name, pool.snapshot()) for pool in pools]
+    lines: List[str] = []
+    for gauge, description in POOL_GAUGES.items():
+        name = f"db_pool_{gauge}"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+        # NullPool など値を持たないプールは出力しない
+        lines += [
+            format_sample(name, {"pool": pool}, snapshot[gauge])  # type: ignore[arg-type]
+            for pool, snapshot in snapshots
+            if snapshot[gauge] is not None
+        ]
+    for counter, description in (
+        ("checkouts", "Total connection checkouts."),
+        ("timeouts", "Total checkouts that timed out waiting for a connection."),
+    ):
+        name = f"db_pool_{counter}_total"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        lines += [
+            format_sample(name, {"pool": pool}, snapshot[counter])  # type: ignore[arg-type]
+            for pool, snapshot in snapshots
+        ]
+    for histogram, description in (
+        ("wait_seconds", "Time spent waiting for a pooled connection."),
+        ("checkout_seconds", "Total connection checkout latency."),
+    ):
+        name = f"db_pool_{histogram}"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for pool, snapshot in snapshots:
+            lines += format_histogram(name, {"pool": pool}, snapshot[histogram])  # type: ignore[arg-type]
+    return lines
+
+
+def threadpool_lines() -> List[str]:
+    """
+    同期処理を実行する AnyIO のスレッドプールの使用状況。
+    """
+    statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    return [
+        "# HELP threadpool_tokens_total Maximum number of worker threads.",
+        "# TYPE threadpool_tokens_total gauge",
+        format_sample("threadpool_tokens_total", {}, statistics.total_tokens),
+        "# HELP threadpool_tokens_borrowed Worker threads currently in use.",
+        "# TYPE threadpool_tokens_borrowed gauge",
+        format_sample("threadpool_tokens_borrowed", {}, statistics.borrowed_tokens),
+        "# HELP threadpool_tasks_waiting Tasks waiting for a worker thread.",
+        "# TYPE threadpool_tasks_waiting gauge",
+        format_sample("threadpool_tasks_waiting", {}, statistics.tasks_waiting),
+    ]
+
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    リクエスト数・レイテンシ、コネクションプール、スレッドプール、
+    パスワードのハッシュ化、レプリカの計測値を Prometheus のテキスト形式で返します。
+    """
+    lines = request_metrics.render()
+    pools = [database.async_pool_metrics, database.pool_metrics]
+    if database.replica_configured():
+        pools.append(database.replica_pool_metrics)
+    lines += pool_lines(pools)
+    lines += threadpool_lines()
+    lines += utils.get_password_hasher().render()
+    if database.replica_configured():
+        lines += get_read_replica_router().render()
+    return PlainTextResponse(
+        "\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@router.get("/pool")
+async def get_pool_metrics():
+    """
+    コネクションプールの状態（チェックアウト中・オーバーフロー中のコネクション数）と、
+    待ち時間・チェックアウト所要時間のヒストグラムを返します。
+    """
+    pools = {
+        "async": database.async_pool_metrics.snapshot(),
+        "sync": database.pool_metrics.snapshot(),
+    }
+    if database.replica_configured():
+        pools["replica"] = database.replica_pool_metrics.snapshot()
+    return pools
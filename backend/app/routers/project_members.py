@@ -2,55 +2,60 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app import database, models, schemas, utils
+from app.etag import etag_matches, not_modified, project_members_etag
+from app.membership import get_project_membership, invalidate_membership
+from app.read_replica import get_cache_fill_db
+from app.response_cache import MEMBERS, cached_response, get_response_cache
 
 router = APIRouter(
     prefix="/projects/{project_id}/members",
     tags=["Project Members"],
 )
 
-
-def get_project_membership(project_id: int, current_user: models.User, db: Session):
-    """
-    現在のユーザーがプロジェクトのメンバーであることを確認します。
-    """
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-    return membership
+member_list_adapter = TypeAdapter(List[schemas.ProjectMemberResponse])
 
 
 @router.get("/", response_model=List[schemas.ProjectMemberResponse])
-def get_project_members(
+async def get_project_members(
     project_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_cache_fill_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクトの全メンバーを取得します。
+    If-None-Match が現在のETagと一致する場合は 304 Not Modified を返します。
     """
-    get_project_membership(project_id, current_user, db)
+    response_cache = get_response_cache()
+    cached, generation = await response_cache.get(MEMBERS, project_id)
+    if cached is not None:
+        return cached_response(request, *cached)
+
+    etag = await project_members_etag(db, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     members = (
-        db.query(models.ProjectMember)
-        .options(joinedload(models.ProjectMember.user))  # ユーザーデータをロード
-        .filter(models.ProjectMember.project_id == project_id)
-        .all()
+        await db.scalars(
+            select(models.ProjectMember)
+            .options(joinedload(models.ProjectMember.user))  # ユーザーデータをロード
+            .where(models.ProjectMember.project_id == project_id)
+            .order_by(models.ProjectMember.id)
+        )
+    ).all()
+    body = member_list_adapter.dump_json(
+        member_list_adapter.validate_python(members, from_attributes=True)
     )
-
-    return members
+    await response_cache.set(MEMBERS, project_id, "", generation, body, etag)
+    return cached_response(request, body, etag)
 
 
 @router.post(
@@ -58,63 +63,62 @@ def get_project_members(
     response_model=schemas.ProjectMemberResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def add_project_member(
+async def add_project_member(
     project_id: int,
     member: schemas.ProjectMemberCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     プロジェクトに新しいメンバーを追加します。
     """
 
     # 追加しようとしているユーザーが存在するか確認
-    user = db.query(models.User).filter(models.User.id == member.user_id).first()
+    user = await db.get(models.User, member.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="指定されたユーザーが見つかりません")
 
     # 既にメンバーとして存在するか確認
-    existing_member = (
-        db.query(models.ProjectMember)
-        .filter(
+    existing_member = await db.scalar(
+        select(models.ProjectMember).where(
             models.ProjectMember.project_id == project_id,
             models.ProjectMember.user_id == member.user_id,
         )
-        .first()
     )
     if existing_member:
         raise HTTPException(status_code=400, detail="既にプロジェクトのメンバーです")
 
+    # レスポンスに含めるユーザー情報は取得済みのものを関連付ける（非同期では遅延ロードできないため）
     new_member = models.ProjectMember(
-        project_id=project_id, user_id=member.user_id, role=member.role
+        project_id=project_id, user_id=member.user_id, role=member.role, user=user
     )
     db.add(new_member)
-    db.commit()
-    db.refresh(new_member)
+    await db.commit()
+    invalidate_membership(new_member.user_id, project_id)
+    await get_response_cache().invalidate(project_id, MEMBERS)
 
     return new_member
 
 
 @router.put("/{member_id}", response_model=schemas.ProjectMemberResponse)
-def update_project_member(
+async def update_project_member(
     project_id: int,
     member_id: int,
     member_update: schemas.ProjectMemberUpdate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     プロジェクトメンバーの情報を更新します。
     """
-    get_project_membership(project_id, current_user, db)
-
-    member = (
-        db.query(models.ProjectMember)
-        .filter(
+    member = await db.scalar(
+        select(models.ProjectMember)
+        .options(joinedload(models.ProjectMember.user))
+        .where(
             models.ProjectMember.id == member_id,
             models.ProjectMember.project_id == project_id,
         )
-        .first()
     )
     if not member:
         raise HTTPException(status_code=404, detail="プロジェクトメンバーが見つかりません")
@@ -123,68 +127,69 @@ def update_project_member(
     new_role = member_update.role.lower()
 
     if original_role == "admin" and new_role != "admin":
-        admin_count = (
-            db.query(models.ProjectMember)
-            .filter(
+        admin_count = await db.scalar(
+            select(func.count())
+            .select_from(models.ProjectMember)
+            .where(
                 models.ProjectMember.project_id == project_id,
                 models.ProjectMember.role.ilike("admin"),
             )
-            .count()
         )
         if admin_count <= 1:
             raise HTTPException(status_code=400, detail="プロジェクトには少なくとも1人のAdminが必要です。")
 
     member.role = member_update.role
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    invalidate_membership(member.user_id, project_id)
+    await get_response_cache().invalidate(project_id, MEMBERS)
     return member
 
 
 @router.delete("/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project_member(
+async def delete_project_member(
     project_id: int,
     member_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     プロジェクトメンバーを削除します。
     """
-    get_project_membership(project_id, current_user, db)
-
-    member = (
-        db.query(models.ProjectMember)
-        .filter(
+    member = await db.scalar(
+        select(models.ProjectMember).where(
             models.ProjectMember.id == member_id,
             models.ProjectMember.project_id == project_id,
         )
-        .first()
     )
     if not member:
         raise HTTPException(status_code=404, detail="プロジェクトメンバーが見つかりません")
 
     # メンバーのロールと総メンバー数をチェック
     if member.role.lower() == "admin":
-        admin_count = (
-            db.query(models.ProjectMember)
-            .filter(
+        admin_count = await db.scalar(
+            select(func.count())
+            .select_from(models.ProjectMember)
+            .where(
                 models.ProjectMember.project_id == project_id,
                 models.ProjectMember.role.ilike("admin"),
             )
-            .count()
         )
         if admin_count <= 1:
             raise HTTPException(status_code=400, detail="プロジェクトには少なくとも1人のAdminが必要です。")
 
-    total_members = (
-        db.query(models.ProjectMember)
-        .filter(models.ProjectMember.project_id == project_id)
-        .count()
+    total_members = await db.scalar(
+        select(func.count())
+        .select_from(models.ProjectMember)
+        .where(models.ProjectMember.project_id == project_id)
     )
     if total_members <= 1:
         raise HTTPException(status_code=400, detail="プロジェクトには少なくとも1人のメンバーが必要です。")
 
-    db.delete(member)
-    db.commit()
+    user_id = member.user_id
+    await db.delete(member)
+    await db.commit()
+    invalidate_membership(user_id, project_id)
+    await get_response_cache().invalidate(project_id, MEMBERS)
 
     return
@@ -1,9 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import database, models, schemas, utils
+from app.due_task_index import get_due_task_index
+from app.etag import etag_matches, not_modified, projects_etag, set_etag
+from app.membership import invalidate_project_memberships
+from app.read_replica import get_read_db
+from app.response_cache import DUE_TASKS, MEMBERS, TASKS, get_response_cache
 
 router = APIRouter(
     prefix="/projects",
@@ -14,10 +20,10 @@ router = APIRouter(
 @router.post(
     "/", response_model=schemas.ProjectResponse, status_code=status.HTTP_201_CREATED
 )
-def create_project(
+async def create_project(
     project: schemas.ProjectCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     新しいプロジェクトを作成します。
@@ -26,53 +32,62 @@ def create_project(
         name=project.name, description=project.description, owner_id=current_user.id
     )
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
 
     # プロジェクトメンバーとしてオーナーを追加
     project_member = models.ProjectMember(
         project_id=new_project.id, user_id=current_user.id, role="Admin"
     )
     db.add(project_member)
-    db.commit()
+    await db.commit()
 
     return new_project
 
 
 @router.get("/", response_model=List[schemas.ProjectResponse])
-def get_projects(
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+async def get_projects(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     現在のユーザーが参加しているすべてのプロジェクトを取得します。
+    If-None-Match が現在のETagと一致する場合は 304 Not Modified を返します。
     """
+    etag = await projects_etag(db, current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     projects = (
-        db.query(models.Project)
-        .join(models.ProjectMember)
-        .filter(models.ProjectMember.user_id == current_user.id)
-        .all()
-    )
+        await db.scalars(
+            select(models.Project)
+            .join(models.ProjectMember)
+            .where(models.ProjectMember.user_id == current_user.id)
+            .order_by(models.Project.id)
+        )
+    ).all()
     return projects
 
 
 @router.get("/{project_id}", response_model=schemas.ProjectResponse)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     特定のプロジェクトの詳細を取得します。
     """
-    project = (
-        db.query(models.Project)
+    project = await db.scalar(
+        select(models.Project)
         .join(models.ProjectMember)
-        .filter(
+        .where(
             models.Project.id == project_id,
             models.ProjectMember.user_id == current_user.id,
         )
-        .first()
     )
 
     if not project:
@@ -84,21 +99,19 @@ def get_project(
 
 
 @router.put("/{project_id}", response_model=schemas.ProjectResponse)
-def update_project(
+async def update_project(
     project_id: int,
     project_update: schemas.ProjectCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     プロジェクトの情報を更新します。
     """
-    project = (
-        db.query(models.Project)
-        .filter(
+    project = await db.scalar(
+        select(models.Project).where(
             models.Project.id == project_id, models.Project.owner_id == current_user.id
         )
-        .first()
     )
 
     if not project:
@@ -110,27 +123,25 @@ def update_project(
 
     if project_update.description is not None:
         project.description = project_update.description
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
 
     return project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
 ):
     """
     プロジェクトを削除します。
     """
-    project = (
-        db.query(models.Project)
-        .filter(
+    project = await db.scalar(
+        select(models.Project).where(
             models.Project.id == project_id, models.Project.owner_id == current_user.id
         )
-        .first()
     )
 
     if not project:
@@ -138,7 +149,10 @@ def delete_project(
             status_code=status.HTTP_404_NOT_FOUND, detail="プロジェクトが見つかりませんまたは権限がありません"
         )
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
+    get_due_task_index().invalidate(project_id)
+    invalidate_project_memberships(project_id)
+    await get_response_cache().invalidate(project_id, TASKS, MEMBERS, DUE_TASKS)
 
     return
@@ -1,44 +1,56 @@
 import csv
-from typing import List
-
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
+import io
+from datetime import datetime
+from itertools import islice
+from typing import List, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app import database, models, schemas, utils
+from app.due_task_index import get_due_task_index
+from app.etag import etag_matches, not_modified, tasks_etag
+from app.membership import get_project_membership
+from app.read_replica import get_cache_fill_db, get_read_db
+from app.response_cache import DUE_TASKS, TASKS, cached_response, get_response_cache
+from app.serialization import row_dicts
 
 router = APIRouter(
     prefix="/projects/{project_id}/tasks",
     tags=["Masters"],
 )
 
+# CSVインポートで必要なカラム
+IMPORT_COLUMNS = ("category", "task_name", "frequency")
+# CSVインポートで一度に検証・登録する行数
+IMPORT_BATCH_SIZE = 1000
+# CSVインポートのレスポンスに含めるエラーの最大件数
+IMPORT_MAX_ERRORS = 100
+
+# TaskResponse の列（ORMオブジェクトを経由せずに行をそのままJSONにする）
+TASK_RESPONSE_COLUMNS = [
+    getattr(models.Task, name) for name in schemas.TaskResponse.model_fields
+]
+
 
 @router.post(
     "/", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED
 )
-def create_task(
+async def create_task(
     project_id: int,
     task: schemas.TaskCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクトに新しいタスクを作成します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
     new_task = models.Task(
         project_id=project_id,
         category=task.category,
@@ -46,69 +58,62 @@ def create_task(
         frequency=task.frequency,
     )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await db.commit()
+    await db.refresh(new_task)
+    get_due_task_index().upsert_task(new_task)
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
 
     return new_task
 
 
 @router.get("/", response_model=List[schemas.TaskResponse])
-def get_tasks(
+async def get_tasks(
     project_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_cache_fill_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクト内のすべてのタスクを取得します。
+    If-None-Match が現在のETagと一致する場合は 304 Not Modified を返します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    response_cache = get_response_cache()
+    cached, generation = await response_cache.get(TASKS, project_id)
+    if cached is not None:
+        return cached_response(request, *cached)
+
+    etag = await tasks_etag(db, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    rows = (
+        await db.execute(
+            select(*TASK_RESPONSE_COLUMNS)
+            .where(models.Task.project_id == project_id)
+            .order_by(models.Task.id)
         )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
-    tasks = db.query(models.Task).filter(models.Task.project_id == project_id).all()
-    return tasks
+    ).all()
+    body = orjson.dumps(row_dicts(rows))
+    await response_cache.set(TASKS, project_id, "", generation, body, etag)
+    return cached_response(request, body, etag)
 
 
 @router.get("/{task_id}", response_model=schemas.TaskResponse)
-def get_task(
+async def get_task(
     project_id: int,
     task_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクト内の特定のタスクの詳細を取得します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    task = await db.scalar(
+        select(models.Task).where(
+            models.Task.project_id == project_id, models.Task.id == task_id
         )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
-    task = (
-        db.query(models.Task)
-        .filter(models.Task.project_id == project_id, models.Task.id == task_id)
-        .first()
     )
 
     if not task:
@@ -118,35 +123,21 @@ def get_task(
 
 
 @router.put("/{task_id}", response_model=schemas.TaskResponse)
-def update_task(
+async def update_task(
     project_id: int,
     task_id: int,
     task_update: schemas.TaskCreate,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクト内の特定のタスクを更新します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
+    task = await db.scalar(
+        select(models.Task).where(
+            models.Task.project_id == project_id, models.Task.id == task_id
         )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
-
-    task = (
-        db.query(models.Task)
-        .filter(models.Task.project_id == project_id, models.Task.id == task_id)
-        .first()
     )
 
     if not task:
@@ -154,63 +145,72 @@ def update_task(
 
     task.category = task_update.category
     task.task_name = task_update.task_name
-    task.frequency = task_update.frequency
-    db.commit()
-    db.refresh(task)
+    if task.frequency != task_update.frequency:
+        # 頻度の変更に合わせて次回実施予定日時を再計算
+        task.frequency = task_update.frequency
+        task.set_last_execution(task.last_execution_at)
+    await db.commit()
+    await db.refresh(task)
+    get_due_task_index().upsert_task(task)
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
 
     return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     project_id: int,
     task_id: int,
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     指定されたプロジェクト内の特定のタスクを削除します。
     """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
+    task = await db.scalar(
+        select(models.Task).where(
+            models.Task.project_id == project_id, models.Task.id == task_id
         )
-
-    task = (
-        db.query(models.Task)
-        .filter(models.Task.project_id == project_id, models.Task.id == task_id)
-        .first()
     )
 
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="タスクが見つかりません")
 
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
+    get_due_task_index().remove_task(project_id, task_id)
+    await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
 
     return
 
 
+def read_csv_rows(reader: csv.DictReader, size: int) -> List[Tuple[int, dict]]:
+    """
+    CSVから最大 size 行を読み込み、(行番号, 行) のリストを返します。
+    """
+    return [(reader.line_num, row) for row in islice(reader, size)]
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
 @router.post(
     "/upload",
+    response_model=schemas.TaskImportResponse,
     status_code=status.HTTP_201_CREATED,
     summary="CSVファイルからタスクを一括アップロード",
 )
 async def upload_tasks(
     project_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.CurrentUser = Depends(utils.get_current_user),
+    membership: schemas.ProjectMembership = Depends(get_project_membership),
 ):
     """
     CSVファイルをアップロードして、一括でタスクを作成します。
@@ -218,71 +218,91 @@ async def upload_tasks(
     - category
     - task_name
     - frequency
-    """
-    # プロジェクトメンバーシップの確認
-    membership = (
-        db.query(models.ProjectMember)
-        .filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-        )
-        .first()
-    )
-
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトに参加していません"
-        )
 
+    ファイルは IMPORT_BATCH_SIZE 行ずつ読み込んで検証・登録するため、行数によらず
+    メモリ使用量は一定です。不正な行は登録せず、行番号とエラー内容を返します。
+    """
     if file.content_type != "text/csv":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="CSVファイルをアップロードしてください"
         )
 
-    try:
-        # CSVファイルの読み取り
-        contents = await file.read()
-        decoded = contents.decode("utf-8").splitlines()
-        reader = csv.DictReader(decoded)
-        print(reader)
-        tasks_to_create: list[dict[str, str | int]] = []
-        for row in reader:
-            print(row)
-            # 必要なカラムが存在するか確認
-            if not all(key in row for key in ["category", "task_name", "frequency"]):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="CSVファイルのフォーマットが正しくありません。'category', 'task_name', 'frequency'カラムが必要です。",
-                )
-            # タスク作成用の辞書を追加
-            tasks_to_create.append(
-                {
-                    "project_id": project_id,
-                    "category": row["category"],
-                    "task_name": row["task_name"],
-                    "frequency": row["frequency"],
-                }
-            )
+    # アップロードされたファイルを全体を読み込まずに少しずつデコードする（BOM付きも可）
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text_stream)
 
-        # タスクの一括作成
-        new_tasks: list[dict[str, str | int]] = []
-        for task_data in tasks_to_create:
-            new_task = models.Task(
-                project_id=task_data["project_id"],
-                category=task_data["category"],
-                task_name=task_data["task_name"],
-                frequency=task_data["frequency"],
+    created = 0
+    failed = 0
+    errors: List[schemas.TaskImportError] = []
+    now = datetime.now()
+    try:
+        # ファイルの読み込みはディスクI/Oになり得るためスレッドプールで行う
+        fieldnames = await run_in_threadpool(lambda: reader.fieldnames)
+        if not fieldnames or not all(
+            column in fieldnames for column in IMPORT_COLUMNS
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSVファイルのフォーマットが正しくありません。'category', 'task_name', 'frequency'カラムが必要です。",
             )
-            db.add(new_task)
-            new_tasks.append(new_task)
 
-        db.commit()
+        while batch := await run_in_threadpool(
+            read_csv_rows, reader, IMPORT_BATCH_SIZE
+        ):
+            values = []
+            for line, row in batch:
+                try:
+                    task = schemas.TaskCreate.model_validate(row)
+                except ValidationError as exc:
+                    failed += 1
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        errors.append(
+                            schemas.TaskImportError(
+                                line=line, message=format_validation_error(exc)
+                            )
+                        )
+                    continue
+                # 未実行のタスクは作成日時が次回実施予定日時となる
+                values.append(
+                    {
+                        "project_id": project_id,
+                        **task.model_dump(),
+                        "next_due_at": now,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
 
-        # 作成されたタスクを返す
-        return [schemas.TaskResponse.model_validate(task) for task in new_tasks]
+            # 複数行の INSERT にまとめて登録する
+            if values:
+                await db.execute(insert(models.Task), values)
+                created += len(values)
 
-    except Exception:
+        await db.commit()
+    except UnicodeDecodeError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSVファイルを読み込めませんでした。UTF-8のCSVファイルを指定してください。",
+        )
+    except csv.Error:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSVファイルの{reader.line_num}行目のフォーマットが正しくありません。",
+        )
+    except SQLAlchemyError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="CSVファイルの処理中にエラーが発生しました。",
         )
+    finally:
+        # UploadFile のファイルは FastAPI が閉じるため切り離しておく
+        text_stream.detach()
+
+    if created:
+        get_due_task_index().invalidate(project_id)
+        await get_response_cache().invalidate(project_id, TASKS, DUE_TASKS)
+
+    return schemas.TaskImportResponse(created=created, failed=failed, errors=errors)
@@ -1,9 +1,11 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import database, models, schemas
+from app import models, schemas
+from app.read_replica import get_read_db
 
 router = APIRouter(
     prefix="/users",
@@ -12,22 +14,20 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.UserResponse])
-def get_users(
+async def get_users(
     email: Optional[str] = Query(None, min_length=1),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    query = select(models.User)
     if email:
-        users = (
-            db.query(models.User).filter(models.User.email.ilike(f"%{email}%")).all()
-        )
-    else:
-        users = db.query(models.User).all()
+        query = query.where(models.User.email.ilike(f"%{email}%"))
+    users = (await db.scalars(query)).all()
     return users
 
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
-def get_user(user_id: int, db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません。")
     return user
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 # ============================
 # Authentication Schemas
@@ -44,6 +44,15 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+# 認証済みユーザー（パスワードハッシュを含まない）
+class CurrentUser(UserBase):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -95,6 +104,17 @@ class ProjectMemberUpdate(BaseModel):
     role: str
 
 
+# リクエスト中のユーザーのメンバーシップ（権限確認用）
+class ProjectMembership(BaseModel):
+    id: int
+    project_id: int
+    user_id: int
+    role: str
+
+    class Config:
+        from_attributes = True
+
+
 class ProjectMemberResponse(BaseModel):
     id: int
     project_id: int
@@ -130,6 +150,23 @@ class TaskResponse(TaskBase):
         from_attributes = True
 
 
+class ProjectDueTasksResponse(BaseModel):
+    project_id: int
+    project_name: str
+    tasks: List[TaskResponse]
+
+
+class TaskImportError(BaseModel):
+    line: int  # CSVファイル上の行番号（ヘッダーが1行目）
+    message: str
+
+
+class TaskImportResponse(BaseModel):
+    created: int
+    failed: int
+    errors: List[TaskImportError]  # 先頭から一定件数までのエラー
+
+
 # ============================
 # Task Execution Schemas
 # ============================
@@ -157,6 +194,25 @@ class TaskExecutionCreateResponse(TaskExecutionBase):
         from_attributes = True
 
 
+# 一括登録で一度に受け付ける実行履歴の件数
+BATCH_MAX_ITEMS = 1000
+
+
+class TaskExecutionBatchCreate(BaseModel):
+    # 上限を超えた場合は残りの項目を検証せずに 422 を返す
+    items: List[TaskExecutionCreate] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+
+class TaskExecutionBatchError(BaseModel):
+    index: int  # リクエストの items 内の位置（0始まり）
+    message: str
+
+
+class TaskExecutionBatchResponse(BaseModel):
+    created: List[TaskExecutionCreateResponse]
+    errors: List[TaskExecutionBatchError]
+
+
 class TaskExecutionResponse(TaskExecutionBase):
     id: int
     task_id: int
@@ -169,3 +225,25 @@ class TaskExecutionResponse(TaskExecutionBase):
 
     class Config:
         from_attributes = True
+
+
+class TaskExecutionPageResponse(BaseModel):
+    items: List[TaskExecutionResponse]
+    next_cursor: Optional[str] = None  # 続きがない場合はNone
+
+
+class TaskExecutionCountByUser(BaseModel):
+    user_id: int
+    user_name: str
+    count: int
+
+
+class TaskExecutionCountByCategory(BaseModel):
+    category: str
+    count: int
+
+
+class TaskExecutionSummaryResponse(BaseModel):
+    total: int
+    by_user: List[TaskExecutionCountByUser]
+    by_category: List[TaskExecutionCountByCategory]
@@ -0,0 +1,14 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.engine import Row
+
+
+def row_dicts(rows: Sequence[Row]) -> List[Dict[str, Any]]:
+    """
+    結果の行を列名をキーとする辞書のリストに変換します。
+    orjson でそのままエンコードでき、行ごとの Row._asdict() より高速です。
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row, strict=True)) for row in rows]
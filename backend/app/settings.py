@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Optional
 
 from dotenv import load_dotenv
@@ -7,10 +8,6 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 # 環境変数ENVIRONMENTに基づいて処理を分岐
 environment = os.getenv("ENVIRONMENT", "development")
 
-if environment != "production":
-    # production以外の場合は.envファイルをロード
-    load_dotenv(".env.development")
-
 
 class Settings(BaseSettings):
     environment: str = environment  # デフォルトは開発環境
@@ -20,6 +17,74 @@ class Settings(BaseSettings):
     local_database_url: Optional[str] = None  # ローカル開発用のデータベースURLを追加
     secret_key: Optional[str] = None
     access_token_expire_minutes: int = 30
+    refresh_token_max_per_user: int = 10  # ユーザーごとの有効なリフレッシュトークンの上限（0 の場合は無制限）
+    refresh_token_purge_interval_seconds: int = 3600  # 0 の場合は期限切れトークンの定期削除を無効化
+    refresh_token_purge_batch_size: int = 1000  # 1回のトランザクションで削除する件数
+    # bcrypt のコスト（変更すると既存ユーザーのハッシュは次回ログイン時に新しいコストで再ハッシュされる）
+    bcrypt_rounds: int = 12
+    # パスワードのハッシュ化・検証を同時に実行する数（既定はCPU数）
+    password_hash_workers: int = os.cpu_count() or 1
+    # アクセストークンにユーザー名・メールアドレスを含め、認証時のDB参照を省略する
+    access_token_user_claims: bool = False
+    # ユーザー情報のキャッシュの有効期間（0 の場合は無効化）
+    # ワーカーごとのため、他のワーカーでのプロフィールの変更は最大でこの秒数だけ反映されない。
+    # gunicorn.conf.py では複数ワーカーの場合、明示的に指定しない限り 0 にする
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 10000
+    # 実施予定タスクのインメモリインデックスの再構築間隔（0 の場合は無効化）
+    # インデックスはワーカーごとのため、他のワーカーでの更新は最大でこの秒数だけ反映されず、
+    # redis のレスポンスキャッシュを使う場合は古い結果が全ワーカーに共有されることもある。
+    # gunicorn.conf.py では複数ワーカーの場合、明示的に指定しない限り 0 にする
+    due_task_index_ttl_seconds: int = 300
+    due_task_index_max_projects: int = 1000
+    # メンバーシップのキャッシュの有効期間（0 の場合は無効化）
+    # ワーカーごとのため、他のワーカーでのメンバー削除・ロール変更は最大でこの秒数だけ反映されない。
+    # gunicorn.conf.py では複数ワーカーの場合、明示的に指定しない限り 0 にする
+    membership_cache_ttl_seconds: int = 30
+    membership_cache_max_entries: int = 10000
+    # タスク・メンバー・実施予定タスクの一覧のレスポンスキャッシュ（"memory" / "redis" / "none"）
+    # memory はワーカーごとのため、他のワーカーでの更新は最大で TTL の間だけ反映されない。
+    # gunicorn.conf.py では複数ワーカーの場合、redis を使うか TTL を明示的に指定しない限り無効にする
+    response_cache_backend: str = "memory"
+    response_cache_ttl_seconds: int = 60  # 0 の場合はレスポンスキャッシュを無効化
+    response_cache_max_bytes: int = 32 * 1024 * 1024  # memory の場合の合計サイズの上限
+    response_cache_redis_url: Optional[str] = None  # redis の場合の接続先（redis://...）
+    # エンドポイントごとのSQL発行数の上限を超えた場合にエラーにするか（開発環境では有効）
+    query_budget_enforce: bool = environment != "production"
+    # SQLの発行数と実行時間を Server-Timing ヘッダーで返す
+    sql_server_timing: bool = True
+    # SQL文をログに出力するリクエストの割合（0〜1。0 の場合は出力しない）
+    sql_debug_sample_rate: float = 0.0
+    # コネクションプールの設定（ワーカーごと。ワーカー数 × (pool_size + max_overflow) がDBの上限を超えないようにする）
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30  # 空きコネクションを待つ最大秒数
+    db_pool_recycle: int = 1800  # 指定秒数より古いコネクションを作り直す（-1 で無効）
+    db_pool_pre_ping: bool = False  # チェックアウトのたびに接続を確認する
+    # PgBouncer（Supabase の Transaction pooler など）経由で接続する場合に有効にする
+    # アプリ側ではプールせず、asyncpg のプリペアドステートメントのキャッシュを無効にする
+    db_pgbouncer: bool = False
+    # 本番用のサーバー（gunicorn.conf.py）の設定
+    server_workers: int = os.cpu_count() or 1  # ワーカープロセス数（既定はCPU数）
+    # 指定した数のリクエストを処理したワーカーを入れ替える（0 の場合は入れ替えない）
+    # jitter の範囲で数をずらし、全ワーカーが同時に再起動しないようにする
+    server_max_requests: int = 10000
+    server_max_requests_jitter: int = 1000
+    server_graceful_timeout_seconds: int = 30  # 停止・入れ替え時に処理中のリクエストを待つ秒数
+    # 読み取り専用のレプリカ（未設定の場合はすべてプライマリで処理する）
+    replica_database_url: Optional[str] = None
+    # レプリカの遅延の許容秒数（超えた場合は遅延が戻るまでプライマリから読む）と、遅延を確認する間隔
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 1.0
+    # 更新したユーザーの読み込みを指定秒数の間プライマリで処理する（ワーカーごとに記録）
+    replica_read_your_writes_seconds: float = 5.0
+    replica_read_your_writes_max_users: int = 10000
+    # /metrics と /readyz の詳細を参照するためのトークン（Authorization: Bearer <トークン>）
+    # 未設定の場合、本番環境では公開せず（/readyz は status のみ）、開発環境では認証なしで参照できる
+    metrics_token: Optional[str] = None
+    # /readyz のDB接続確認のタイムアウト（プールの空きを待つ時間を含む）と結果のキャッシュ期間
+    readiness_timeout_seconds: float = 2.0
+    readiness_cache_seconds: float = 5.0
 
     model_config = SettingsConfigDict(env_file=None)  # 本番環境ではenv_fileを使用しない
 
@@ -41,4 +106,19 @@ class Settings(BaseSettings):
                 raise ValueError("SECRET_KEY が設定されていません。環境変数を確認してください。")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    設定を読み込んで検証します（初回の呼び出し時のみ。以降は同じインスタンスを返します）。
+    """
+    if environment != "production":
+        # production以外の場合は.envファイルをロード
+        load_dotenv(".env.development")
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `from app.settings import settings` の時点まで設定の読み込みを遅らせる
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,143 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SQLStats:
+    """
+    1リクエストで発行されたSQLの数と合計実行時間。
+    sampled が有効なリクエストではSQL文もログに出力します。
+    """
+
+    statements: int = 0
+    seconds: float = 0.0
+    sampled: bool = False
+
+
+# 現在のリクエストのSQL統計（依存関係とエンドポイントでコンテキストがコピーされても共有されるようオブジェクトで保持）
+_request_stats: ContextVar[Optional[SQLStats]] = ContextVar(
+    "sql_request_stats", default=None
+)
+
+
+def current_stats() -> Optional[SQLStats]:
+    return _request_stats.get()
+
+
+def start_stats(sampled: bool = False):
+    """
+    新しいSQL統計を現在のコンテキストに設定し、(統計, 復元用トークン) を返します。
+    """
+    stats = SQLStats(sampled=sampled)
+    return stats, _request_stats.set(stats)
+
+
+def reset_stats(token) -> None:
+    _request_stats.reset(token)
+
+
+# エンジンは最初に使われた時点で作成されるため、すべてのエンジンに対してイベントを登録する
+# （リクエストの外で実行されたSQLは統計がないため何もしない）
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        conn.info.setdefault("sql_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started = conn.info.get("sql_started_at")
+    if stats is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats.statements += 1
+    stats.seconds += elapsed
+    if stats.sampled:
+        # パラメータには認証情報が含まれ得るためSQL文のみ出力する
+        logger.info(
+            "sql sample duration_ms=%.2f statement=%s", elapsed * 1000, statement
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # エラーで after_cursor_execute が呼ばれなかった分の開始時刻を破棄する
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("sql_started_at"):
+        conn.info["sql_started_at"].pop()
+
+
+class SQLInstrumentationMiddleware:
+    """
+    リクエストごとに発行されたSQLの数と合計実行時間を集計するミドルウェア。
+
+    集計結果は Server-Timing ヘッダー（settings.sql_server_timing 有効時）と
+    構造化ログ（logger: app.sql_instrumentation）に出力します。
+    settings.sql_debug_sample_rate の割合のリクエストではSQL文もログに出力します。
+    Server-Timing にはレスポンスヘッダーの送信までに発行されたSQLのみが含まれます。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        sampled = (
+            settings.sql_debug_sample_rate > 0
+            and random.random() < settings.sql_debug_sample_rate
+        )
+        stats, token = start_stats(sampled=sampled)
+        status_code = 0
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.sql_server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.statements} queries"',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_stats(token)
+            logger.info(
+                "sql method=%s path=%s status=%d statements=%d sql_ms=%.1f total_ms=%.1f",
+                scope["method"],
+                scope["path"],
+                status_code,
+                stats.statements,
+                stats.seconds * 1000,
+                (time.perf_counter() - started) * 1000,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "sql_statements": stats.statements,
+                    "sql_seconds": stats.seconds,
+                    "sql_sampled": stats.sampled,
+                },
+            )
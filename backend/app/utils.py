@@ -1,112 +1,247 @@
-from datetime import datetime, timedelta
+import hmac
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import database, models, schemas
-from app.settings import settings
+from app.cache import TTLCache
+from app.password_hasher import PasswordHasher
+from app.refresh_tokens import (
+    REFRESH_TOKEN_EXPIRE,
+    find_refresh_token,
+    store_refresh_token,
+)
+from app.settings import get_settings
 
-# パスワードハッシュ化の設定
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 # JWT設定
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = (
-    settings.access_token_expire_minutes if settings.access_token_expire_minutes else 15
-)
-if settings.secret_key:
-    SECRET_KEY = settings.secret_key
+
+# アクセストークンに含めるユーザー情報のクレーム
+USER_CLAIMS = ("username", "email", "created_at")
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasher:
+    """
+    パスワードハッシュ化（bcrypt）の設定を返します（最初の呼び出しで作成）。
+    """
+    settings = get_settings()
+    pwd_context = CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds
+    )
+    return PasswordHasher(pwd_context, settings.password_hash_workers)
+
+
+@lru_cache
+def get_user_cache() -> TTLCache[int, schemas.CurrentUser]:
+    """
+    認証済みユーザー情報のキャッシュ（user_id をキーとする）を返します（最初の呼び出しで作成）。
+    """
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.user_cache_max_entries,
+        ttl_seconds=settings.user_cache_ttl_seconds,
+    )
 
 
-def hash_password(password: str) -> str:
+def to_naive_local(value: datetime) -> datetime:
+    """
+    タイムゾーン付きの日時を、タイムゾーンなしのサーバーのローカル時刻に変換します。
+    DBの日時のカラムはタイムゾーンなしで、モデルの既定値（datetime.now）と同じく
+    サーバーのローカル時刻で保存するため、比較・保存の前にこの形に揃えます。
+    タイムゾーンなしの日時はそのまま返します。
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def metrics_authorized(authorization: Optional[str]) -> bool:
+    """
+    内部向けの計測値を参照できるリクエストかを返します。
+    settings.metrics_token が設定されている場合は Authorization ヘッダーのトークンと比較し、
+    未設定の場合は本番環境以外でのみ参照できます。
+    """
+    settings = get_settings()
+    if not settings.metrics_token:
+        return settings.environment != "production"
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        token.encode(), settings.metrics_token.encode()
+    )
+
+
+async def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    内部向けのエンドポイント（/metrics）のアクセスを制限する依存関係。
+    参照できない場合はエンドポイントが存在しないものとして 404 を返します。
+    """
+    if not metrics_authorized(authorization):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+async def hash_password(password: str) -> str:
     """
     パスワードをハッシュ化します。
+    bcrypt はCPUを占有するため、イベントループを止めないよう専用の上限付きでスレッドで実行します。
     """
-    return pwd_context.hash(password)
+    return await get_password_hasher().hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     平文のパスワードとハッシュ化されたパスワードを比較します。
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await get_password_hasher().verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict[str, Any]) -> str:
     """
     JWTアクセストークンを生成します。
     """
+    settings = get_settings()
     to_encode = data.copy()
-    expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # exp はUNIX時刻に変換されるため、タイムゾーン付きのUTCで指定する
+    # （タイムゾーンなしの日時はUTCとして扱われ、サーバーのローカル時刻だとずれる）
+    expire = datetime.now(timezone.utc) + timedelta(
+        minutes=settings.access_token_expire_minutes or 15
+    )
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def access_token_claims(user: models.User) -> dict[str, Any]:
+    """
+    アクセストークンに含めるクレームを生成します。
+    settings.access_token_user_claims が有効な場合はユーザー情報も含め、
+    認証時のデータベース参照を省略できるようにします。
+    """
+    claims: dict[str, Any] = {"sub": str(user.id)}
+    if get_settings().access_token_user_claims:
+        claims.update(
+            {
+                "username": user.username,
+                "email": user.email,
+                "created_at": user.created_at.isoformat(),
+            }
+        )
+    return claims
+
+
 def create_refresh_token(
     data: dict[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
     """
     JWTリフレッシュトークンを生成します。
+    jti（乱数）を含めるため、同じユーザーに同じ秒に発行しても異なるトークンになります。
     """
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now() + timedelta(days=3)  # デフォルトで3日間有効
+        expire = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt.encode(to_encode, get_settings().secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 # ユーザーの認証
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    """
+    メールアドレスとパスワードでユーザーを認証します（パスワードの検証は1回のみ）。
+    ハッシュのコストが settings.bcrypt_rounds と異なる場合は再ハッシュした値を
+    user.password_hash に設定するため、呼び出し側でコミットしてください。
+    """
+    user = await db.scalar(select(models.User).where(models.User.email == email))
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await get_password_hasher().verify_and_update(
+        password, user.password_hash
+    )
+    if not valid:
         return False
+    if new_hash is not None:
+        user.password_hash = new_hash
     return user
 
 
-def get_current_user(
-    token: str = Depends(database.oauth2_scheme), db: Session = Depends(database.get_db)
-) -> models.User:
+async def get_current_user(
+    token: str = Depends(database.oauth2_scheme),
+    db: AsyncSession = Depends(database.get_async_db),
+) -> schemas.CurrentUser:
     """
-    現在のユーザーを取得します。トークンを検証し、ユーザー情報をデータベースから取得します。
+    現在のユーザーを取得します。トークンを検証し、ユーザー情報を以下の順で取得します。
+    1. トークンに含まれるユーザー情報のクレーム（settings.access_token_user_claims 有効時）
+    2. ユーザー情報のキャッシュ
+    3. データベース
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="認証に失敗しました",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    settings = get_settings()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if settings.access_token_user_claims and all(
+        claim in payload for claim in USER_CLAIMS
+    ):
+        return schemas.CurrentUser(
+            id=user_id,
+            username=payload["username"],
+            email=payload["email"],
+            created_at=payload["created_at"],
+        )
+
+    user_cache = get_user_cache()
+    current_user = user_cache.get(user_id)
+    if current_user is not None:
+        return current_user
+
+    user = await db.get(models.User, user_id)
     if user is None:
         raise credentials_exception
-    return user
+    current_user = schemas.CurrentUser.model_validate(user)
+    user_cache.set(user_id, current_user)
+    return current_user
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """
+    プロフィールやパスワードの変更時にユーザー情報のキャッシュを破棄します。
+    """
+    get_user_cache().delete(user_id)
 
 
-def refresh_access_token(
-    refresh_token: schemas.RefreshTokenRequest, db: Session = Depends(database.get_db)
+async def refresh_access_token(
+    refresh_token: schemas.RefreshTokenRequest,
+    db: AsyncSession = Depends(database.get_async_db),
 ):
     try:
         payload = jwt.decode(
-            refresh_token.refresh_token, SECRET_KEY, algorithms=[ALGORITHM]
+            refresh_token.refresh_token,
+            get_settings().secret_key,
+            algorithms=[ALGORITHM],
         )
         user_id = payload.get("sub")
         if user_id is None:
@@ -119,41 +254,27 @@ def refresh_access_token(
         )
 
     # リフレッシュトークンの存在と有効期限を確認
-    stored_token = (
-        db.query(models.RefreshToken)
-        .filter(
-            models.RefreshToken.token == refresh_token.refresh_token,
-            models.RefreshToken.expires_at > datetime.now(),
-        )
-        .first()
-    )
+    stored_token = await find_refresh_token(db, refresh_token.refresh_token)
 
-    if not stored_token:
+    if not stored_token or stored_token.user_id != int(user_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="有効なリフレッシュトークンではありません。"
         )
 
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    user = await db.get(models.User, int(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="ユーザーが存在しません。"
         )
 
     # 新しいアクセストークンを生成
-    new_access_token = create_access_token(data={"sub": str(user.id)})
+    new_access_token = create_access_token(data=access_token_claims(user))
 
     # リフレッシュトークンをローテーション（新しいトークンを発行し、古いトークンを削除）
-    db.delete(stored_token)
-    new_refresh_token = create_refresh_token(
-        data={"sub": str(user.id)}, expires_delta=timedelta(days=3)
-    )
-    new_stored_refresh_token = models.RefreshToken(
-        token=new_refresh_token,
-        user_id=user.id,
-        expires_at=datetime.now() + timedelta(days=3),
-    )
-    db.add(new_stored_refresh_token)
-    db.commit()
+    await db.delete(stored_token)
+    new_refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    await store_refresh_token(db, user.id, new_refresh_token)
+    await db.commit()
 
     return {
         "access_token": new_access_token,
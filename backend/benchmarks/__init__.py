@@ -0,0 +1,8 @@
+"""
+エンドツーエンドの負荷試験
+
+- seed: 家庭のタスクを模した合成データをデータベースに投入します
+- load: 起動済みのAPIサーバー（またはプロセス内のアプリ）に実際の利用に近いリクエストを送り、
+  ルートごとのスループットとレイテンシ（p50/p95/p99）をJSONで出力します
+- compare: 2つの計測結果（コミット間など）を比較します
+"""
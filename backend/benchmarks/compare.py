@@ -0,0 +1,55 @@
+"""
+負荷試験の結果の比較
+
+benchmarks.load が出力した2つのJSON（変更前と変更後）を読み込み、
+ルートごとのスループットとレイテンシの変化率を表示します。
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.compare results/before.json results/after.json
+"""
+
+import argparse
+import json
+from typing import Optional
+
+METRICS = ["throughput", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(before: Optional[float], after: Optional[float]) -> str:
+    if before is None or after is None:
+        return f"{'-':>9}"
+    if before == 0:
+        return f"{'n/a':>9}"
+    return f"{(after - before) / before * 100:+8.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="負荷試験の結果の比較")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before.get('commit')} ({before.get('timestamp')})")
+    print(f"after:  {after.get('commit')} ({after.get('timestamp')})")
+    print(f"{'route':48} " + " ".join(f"{metric:>9}" for metric in METRICS))
+
+    routes = sorted(set(before["routes"]) | set(after["routes"]))
+    rows = [
+        (route, before["routes"].get(route, {}), after["routes"].get(route, {}))
+        for route in routes
+    ]
+    rows.append(("total", before["total"], after["total"]))
+    for route, old, new in rows:
+        print(
+            f"{route:48} "
+            + " ".join(change(old.get(metric), new.get(metric)) for metric in METRICS)
+        )
+
+
+if __name__ == "__main__":
+    main()
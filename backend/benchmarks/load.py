@@ -0,0 +1,341 @@
+"""
+エンドツーエンドの負荷試験
+
+benchmarks.seed で投入したユーザーとしてログインした仮想ユーザーが、
+実際の利用に近い割合（MIX）でログイン・実施予定タスクの取得・実行履歴の取得・
+実行の登録を繰り返し、ルートごとのスループットとレイテンシ（p50/p95/p99）を計測します。
+結果はコミットのハッシュとともにJSONで出力されるため、コミット間で比較できます（benchmarks.compare）。
+
+--base-url を省略するとプロセス内のアプリ（app.main:app）に直接リクエストを送ります。
+実行の登録によってデータが増えるため、比較する計測の前には seed --reset で投入し直してください。
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.seed --reset
+    uvicorn app.main:app
+    python -m benchmarks.load --base-url http://localhost:8000 --virtual-users 50 \\
+        --duration 60 --output results/$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+# 操作ごとの重み（仮想ユーザーは毎回この割合で次の操作を選ぶ）
+MIX = {
+    "login": 1,
+    "due_tasks": 4,
+    "my_due_tasks": 2,
+    "list_executions": 3,
+    "create_execution": 1,
+}
+
+# 結果のキーとするルートのテンプレート（サーバー側の /metrics のラベルと揃える）
+ROUTES = {
+    "login": "POST /auth/login/",
+    "due_tasks": "GET /projects/{project_id}/tasks/due/",
+    "my_due_tasks": "GET /tasks/due/",
+    "list_executions": "GET /projects/{project_id}/executions/",
+    "create_execution": "POST /projects/{project_id}/executions/{task_id}",
+}
+
+DUE_FILTERS = [None, "today", "tomorrow", "week", "month"]
+
+
+def percentile(sorted_values: List[float], ratio: float) -> Optional[float]:
+    """
+    昇順に並んだ値の百分位数（nearest-rank 法）を返します。
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(len(sorted_values) * ratio + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput": round(len(latencies) / elapsed, 3),
+            "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50_ms": ms(percentile(latencies, 0.50)),
+            "p95_ms": ms(percentile(latencies, 0.95)),
+            "p99_ms": ms(percentile(latencies, 0.99)),
+            "max_ms": ms(latencies[-1] if latencies else None),
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = {}
+        self.enabled = False
+
+    def record(self, route: str, elapsed: float, ok: bool) -> None:
+        # ウォームアップ中の結果は集計しない
+        if not self.enabled:
+            return
+        stats = self.routes.setdefault(route, RouteStats())
+        stats.latencies.append(elapsed)
+        if not ok:
+            stats.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        total = RouteStats()
+        for stats in self.routes.values():
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+        return {
+            "total": total.summary(elapsed),
+            "routes": {
+                route: stats.summary(elapsed)
+                for route, stats in sorted(self.routes.items())
+            },
+        }
+
+
+class VirtualUser:
+    """
+    1人のユーザーとしてログインし、MIX の割合で操作を繰り返します。
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        email: str,
+        password: str,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.project_ids: List[int] = []
+        self.task_ids: Dict[int, List[int]] = {}
+
+    async def request(self, action: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(ROUTES[action], time.perf_counter() - started, False)
+            return None
+        self.recorder.record(
+            ROUTES[action], time.perf_counter() - started, response.status_code < 400
+        )
+        return response
+
+    async def login(self) -> bool:
+        response = await self.request(
+            "login",
+            "POST",
+            "/auth/login/",
+            data={"username": self.email, "password": self.password},
+        )
+        if response is None or response.status_code >= 400:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def setup(self) -> None:
+        """
+        操作の対象とするプロジェクトとタスクを取得します（計測対象外）。
+        """
+        if not await self.login():
+            raise RuntimeError(f"{self.email} でログインできませんでした")
+        response = await self.client.get("/projects/", headers=self.headers)
+        response.raise_for_status()
+        for project in response.json():
+            response = await self.client.get(
+                f"/projects/{project['id']}/tasks/", headers=self.headers
+            )
+            response.raise_for_status()
+            task_ids = [task["id"] for task in response.json()]
+            if task_ids:
+                self.project_ids.append(project["id"])
+                self.task_ids[project["id"]] = task_ids
+        if not self.project_ids:
+            raise RuntimeError(f"{self.email} にはタスクのあるプロジェクトがありません")
+
+    async def step(self) -> None:
+        action = self.rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        project_id = self.rng.choice(self.project_ids)
+        if action == "login":
+            await self.login()
+        elif action == "due_tasks":
+            filter_type = self.rng.choice(DUE_FILTERS)
+            params = {"filter_type": filter_type} if filter_type else {}
+            await self.request(
+                action,
+                "GET",
+                f"/projects/{project_id}/tasks/due/",
+                params=params,
+                headers=self.headers,
+            )
+        elif action == "my_due_tasks":
+            await self.request(action, "GET", "/tasks/due/", headers=self.headers)
+        elif action == "list_executions":
+            # 直近30日分
+            end = date.today()
+            await self.request(
+                action,
+                "GET",
+                f"/projects/{project_id}/executions/",
+                params={
+                    "startDate": (end - timedelta(days=30)).isoformat(),
+                    "endDate": end.isoformat(),
+                },
+                headers=self.headers,
+            )
+        elif action == "create_execution":
+            task_id = self.rng.choice(self.task_ids[project_id])
+            await self.request(
+                action,
+                "POST",
+                f"/projects/{project_id}/executions/{task_id}",
+                headers=self.headers,
+            )
+
+    async def run(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.step()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_client(base_url: Optional[str], virtual_users: int) -> httpx.AsyncClient:
+    if base_url is None:
+        from app.main import app
+
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+        )
+    limits = httpx.Limits(max_connections=virtual_users, max_keepalive_connections=None)
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    async with make_client(args.base_url, args.virtual_users) as client:
+        users = [
+            VirtualUser(
+                client,
+                recorder,
+                f"{args.prefix}-{(index % args.seed_users) + 1}@example.com",
+                args.password,
+                random.Random(args.random_seed + index),
+            )
+            for index in range(args.virtual_users)
+        ]
+        print(f"Setting up {len(users)} virtual users...")
+        await asyncio.gather(*(user.setup() for user in users))
+
+        # 接続の確立やキャッシュの準備が計測結果に影響しないよう事前に実行しておく
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup}s...")
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(user.run(deadline) for user in users))
+
+        print(f"Running for {args.duration}s...")
+        recorder.enabled = True
+        started = time.perf_counter()
+        await asyncio.gather(*(user.run(started + args.duration) for user in users))
+        elapsed = time.perf_counter() - started
+        recorder.enabled = False
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.base_url or "in-process",
+        "virtual_users": args.virtual_users,
+        "duration_seconds": round(elapsed, 3),
+        "mix": MIX,
+        **recorder.summary(elapsed),
+    }
+
+
+def print_summary(result: dict) -> None:
+    def cell(value: Optional[float]) -> str:
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    print(
+        f"{'route':48} {'req':>7} {'err':>5} {'req/s':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    rows = [*result["routes"].items(), ("total", result["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:48} {stats['requests']:7d} {stats['errors']:5d} "
+            f"{stats['throughput']:8.1f} {cell(stats['p50_ms'])} "
+            f"{cell(stats['p95_ms'])} {cell(stats['p99_ms'])}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="エンドツーエンドの負荷試験")
+    parser.add_argument(
+        "--base-url", help="APIサーバーのURL（省略時はプロセス内のアプリに送る）"
+    )
+    parser.add_argument(
+        "--virtual-users", type=int, default=20, help="同時に操作する仮想ユーザー数"
+    )
+    parser.add_argument(
+        "--seed-users",
+        type=int,
+        default=200,
+        help="seed で投入したユーザー数（仮想ユーザーに順番に割り当てる）",
+    )
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--duration", type=float, default=30, help="計測秒数")
+    parser.add_argument(
+        "--warmup", type=float, default=5, help="計測前のウォームアップ秒数"
+    )
+    parser.add_argument(
+        "--random-seed", type=int, default=0, help="操作の選択に使う乱数のシード"
+    )
+    parser.add_argument("--output", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+    if args.virtual_users < 1 or args.seed_users < 1:
+        parser.error("--virtual-users と --seed-users には正の値を指定してください")
+
+    result = asyncio.run(run(args))
+    print_summary(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
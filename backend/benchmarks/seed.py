@@ -0,0 +1,223 @@
+"""
+負荷試験用の合成データの投入
+
+家庭のタスク管理を模したユーザー・プロジェクト・メンバー・タスクと、
+指定した年数分の実行履歴（各タスクの頻度ごとに1件）を PostgreSQL に投入します。
+全ユーザーのパスワードは --password の値で、メールアドレスは
+'{prefix}-{番号}@example.com'（番号は1から）です。負荷試験（benchmarks.load）は
+この規則でログインします。
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.seed --users 200 --projects 100 --tasks 20 --years 3 --reset
+"""
+
+import argparse
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app import database, utils
+
+DEFAULT_PREFIX = "bench"
+DEFAULT_PASSWORD = "bench-password"
+
+# 家庭のタスクのカテゴリ（タスクの番号で順に割り当て）
+CATEGORIES = ["掃除", "洗濯", "料理", "買い物", "ゴミ出し", "育児", "庭仕事"]
+
+SEED_STATEMENTS = [
+    # ユーザー
+    """
+    INSERT INTO users (username, email, password_hash, created_at, updated_at)
+    SELECT :prefix || '_user_' || g, :prefix || '-' || g || '@example.com',
+        :password_hash, now(), now()
+    FROM generate_series(1, :users) AS g
+    """,
+    # 番号からユーザーIDを引くための一時テーブル
+    """
+    CREATE TEMP TABLE seed_users ON COMMIT DROP AS
+    SELECT substring(email FROM '^[^@]*-([0-9]+)@')::int AS idx, id
+    FROM users
+    WHERE email LIKE :email_pattern
+    """,
+    "CREATE UNIQUE INDEX ON seed_users (idx)",
+    # プロジェクト（オーナーはユーザーを順番に割り当て）
+    """
+    INSERT INTO projects (name, owner_id, created_at, updated_at)
+    SELECT :prefix || '_project_' || g, u.id, now(), now()
+    FROM generate_series(1, :projects) AS g
+    JOIN seed_users AS u ON u.idx = ((g - 1) % :users) + 1
+    """,
+    """
+    CREATE TEMP TABLE seed_projects ON COMMIT DROP AS
+    SELECT substring(name FROM '_project_([0-9]+)$')::int AS idx, id, owner_id
+    FROM projects
+    WHERE name LIKE :project_pattern
+    """,
+    "CREATE UNIQUE INDEX ON seed_projects (id)",
+    # プロジェクトメンバー（先頭のメンバーがオーナーかつAdmin）
+    """
+    INSERT INTO project_members (project_id, user_id, role, created_at, updated_at)
+    SELECT p.id, u.id, CASE WHEN m = 1 THEN 'Admin' ELSE 'member' END, now(), now()
+    FROM seed_projects AS p
+    CROSS JOIN generate_series(1, LEAST(:members, :users)) AS m
+    JOIN seed_users AS u ON u.idx = ((p.idx + m - 2) % :users) + 1
+    """,
+    # タスク（頻度は1〜14日）
+    """
+    INSERT INTO tasks (
+        project_id, category, task_name, frequency, next_due_at, created_at, updated_at
+    )
+    SELECT p.id, (:categories)[(t % cardinality(:categories)) + 1], 'task_' || t,
+        (t % 14) + 1, now(), now() - :years * INTERVAL '1 year', now()
+    FROM seed_projects AS p
+    CROSS JOIN generate_series(1, :tasks) AS t
+    """,
+    # 実行履歴（頻度の間隔で過去 :years 年分、実行者はメンバーを順番に割り当て）
+    """
+    INSERT INTO task_executions (task_id, user_id, execution_date, created_at)
+    SELECT t.id, u.id, e.execution_date, e.execution_date
+    FROM tasks AS t
+    JOIN seed_projects AS p ON p.id = t.project_id
+    CROSS JOIN LATERAL (
+        SELECT execution_date, row_number() OVER () AS n
+        FROM generate_series(
+            now() - :years * INTERVAL '1 year', now(), t.frequency * INTERVAL '1 day'
+        ) AS execution_date
+    ) AS e
+    JOIN seed_users AS u
+        ON u.idx = ((p.idx + ((e.n + t.id) % LEAST(:members, :users)) - 1) % :users) + 1
+    """,
+    # 最新実行日時と次回実施予定日時
+    """
+    UPDATE tasks
+    SET last_execution_at = latest.last_execution,
+        next_due_at = latest.last_execution + tasks.frequency * INTERVAL '1 day'
+    FROM (
+        SELECT e.task_id, max(e.execution_date) AS last_execution
+        FROM task_executions AS e
+        JOIN tasks AS t ON t.id = e.task_id
+        JOIN seed_projects AS p ON p.id = t.project_id
+        GROUP BY e.task_id
+    ) AS latest
+    WHERE tasks.id = latest.task_id
+    """,
+]
+
+# 外部キーの参照元から順に削除する
+RESET_STATEMENTS = [
+    """
+    DELETE FROM task_executions
+    WHERE task_id IN (
+        SELECT t.id FROM tasks AS t
+        JOIN projects AS p ON p.id = t.project_id
+        WHERE p.name LIKE :project_pattern
+    )
+    """,
+    """
+    DELETE FROM tasks
+    WHERE project_id IN (SELECT id FROM projects WHERE name LIKE :project_pattern)
+    """,
+    """
+    DELETE FROM project_members
+    WHERE project_id IN (SELECT id FROM projects WHERE name LIKE :project_pattern)
+    """,
+    "DELETE FROM projects WHERE name LIKE :project_pattern",
+    """
+    DELETE FROM refresh_tokens
+    WHERE user_id IN (SELECT id FROM users WHERE email LIKE :email_pattern)
+    """,
+    "DELETE FROM users WHERE email LIKE :email_pattern",
+]
+
+ANALYZED_TABLES = ["users", "projects", "project_members", "tasks", "task_executions"]
+
+
+def like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def patterns(prefix: str) -> dict:
+    return {
+        "email_pattern": like_escape(f"{prefix}-") + "%@example.com",
+        "project_pattern": like_escape(f"{prefix}_project_") + "%",
+    }
+
+
+def reset(connection: Connection, prefix: str) -> None:
+    """
+    以前に同じ prefix で投入したデータを削除します。
+    """
+    params = patterns(prefix)
+    for statement in RESET_STATEMENTS:
+        connection.execute(text(statement), params)
+
+
+def seed(connection: Connection, args: argparse.Namespace) -> None:
+    params = {
+        "prefix": args.prefix,
+        "users": args.users,
+        "projects": args.projects,
+        "members": args.members,
+        "tasks": args.tasks,
+        "years": args.years,
+        "categories": CATEGORIES,
+        # bcrypt は遅いため1回だけハッシュ化して全ユーザーで共有する
+        "password_hash": utils.get_password_hasher().context.hash(args.password),
+        **patterns(args.prefix),
+    }
+    for statement in SEED_STATEMENTS:
+        started = time.perf_counter()
+        result = connection.execute(text(statement), params)
+        summary = " ".join(statement.split())[:60]
+        if result.rowcount >= 0:
+            print(
+                f"{result.rowcount:10d} rows {time.perf_counter() - started:7.1f}s  {summary}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="負荷試験用の合成データの投入")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument(
+        "--members", type=int, default=3, help="1プロジェクトあたりのメンバー数"
+    )
+    parser.add_argument(
+        "--tasks", type=int, default=20, help="1プロジェクトあたりのタスク数"
+    )
+    parser.add_argument(
+        "--years", type=float, default=3, help="実行履歴を遡って生成する年数"
+    )
+    parser.add_argument(
+        "--prefix", default=DEFAULT_PREFIX, help="ユーザー名・プロジェクト名の接頭辞"
+    )
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="同じ接頭辞で投入済みのデータを削除してから投入する",
+    )
+    args = parser.parse_args()
+    if database.engine.dialect.name != "postgresql":
+        parser.error("PostgreSQL のデータベースを DATABASE_URL に指定してください")
+    if min(args.users, args.projects, args.members, args.tasks) < 1 or args.years <= 0:
+        parser.error("件数と年数には正の値を指定してください")
+
+    with database.engine.begin() as connection:
+        if args.reset:
+            print(f"Deleting existing '{args.prefix}' data...")
+            reset(connection, args.prefix)
+        print("Seeding synthetic data...")
+        seed(connection, args)
+
+    # ANALYZE はトランザクションのコミット後に実行してプランナーの統計を更新する
+    with database.engine.connect() as connection:
+        for table in ANALYZED_TABLES:
+            connection.exec_driver_sql(f"ANALYZE {table}")
+        connection.commit()
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+一覧レスポンスのシリアライズのCPU時間の計測
+
+タスク実行履歴の一覧（GET /projects/{project_id}/executions/）と同じ列の行を
+インメモリの SQLite から取得し、JSONにするまでのCPU時間を1万行あたりで比較します。
+DBからの取得は計測に含みません。
+
+- pydantic: 行ごとにスキーマを生成し、response_model で再検証してから標準の json でエンコード
+  （FastAPI の既定の処理と同じ流れ）
+- orjson: 行をそのまま辞書にして orjson でエンコード（現在の実装）
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.serialization --rows 10000 --repeat 20 --output serialization.json
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Sequence
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import DateTime, Integer, String, create_engine, text
+from sqlalchemy.engine import Row
+
+from app import schemas
+from app.serialization import row_dicts
+
+ROWS_SQL = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows)
+SELECT n % 50 AS task_id,
+    n % 4 AS user_id,
+    n AS id,
+    'category_' || (n % 7) AS category,
+    'タスク_' || (n % 50) AS task_name,
+    'ユーザー_' || (n % 4) AS user_name,
+    datetime('2026-01-01', '-' || n || ' hours') AS execution_date,
+    datetime('2026-01-01', '-' || n || ' hours', '+5 minutes') AS created_at
+FROM seq
+"""
+
+page_adapter = TypeAdapter(schemas.TaskExecutionPageResponse)
+
+
+def fetch_rows(count: int) -> List[Row]:
+    engine = create_engine("sqlite://")
+    query = text(ROWS_SQL).columns(
+        task_id=Integer,
+        user_id=Integer,
+        id=Integer,
+        category=String,
+        task_name=String,
+        user_name=String,
+        execution_date=DateTime,
+        created_at=DateTime,
+    )
+    with engine.connect() as connection:
+        return connection.execute(query, {"rows": count}).all()
+
+
+def serialize_pydantic(rows: Sequence[Row]) -> bytes:
+    page = schemas.TaskExecutionPageResponse(
+        items=[
+            schemas.TaskExecutionResponse.model_validate(row._mapping) for row in rows
+        ],
+        next_cursor=None,
+    )
+    # response_model による検証とシリアライズ、JSONResponse のエンコード
+    content = page_adapter.dump_python(
+        page_adapter.validate_python(page, from_attributes=True), mode="json"
+    )
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def serialize_orjson(rows: Sequence[Row]) -> bytes:
+    return orjson.dumps({"items": row_dicts(rows), "next_cursor": None})
+
+
+def measure(
+    serialize: Callable[[Sequence[Row]], bytes], rows: Sequence[Row], repeat: int
+) -> dict:
+    """
+    repeat 回のCPU時間を計測し、1万行あたりのミリ秒に換算します。
+    """
+    serialize(rows)  # ウォームアップ
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        serialize(rows)
+        samples.append(time.process_time() - started)
+    samples.sort()
+    scale = 10000 / len(rows) * 1000
+    return {
+        "cpu_ms_per_10k_rows_min": round(samples[0] * scale, 3),
+        "cpu_ms_per_10k_rows_median": round(samples[len(samples) // 2] * scale, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="一覧レスポンスのシリアライズのCPU時間の計測"
+    )
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+    if args.rows < 1 or args.repeat < 1:
+        parser.error("--rows と --repeat には正の値を指定してください")
+
+    rows = fetch_rows(args.rows)
+    # 2つの方法で同じ内容のJSONになることを確認する
+    if orjson.loads(serialize_pydantic(rows)) != orjson.loads(serialize_orjson(rows)):
+        raise SystemExit("シリアライズ結果が一致しません")
+
+    before = measure(serialize_pydantic, rows, args.repeat)
+    after = measure(serialize_orjson, rows, args.repeat)
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "pydantic": before,
+        "orjson": after,
+        "speedup_median": round(
+            before["cpu_ms_per_10k_rows_median"] / after["cpu_ms_per_10k_rows_median"],
+            2,
+        ),
+    }
+    for name in ("pydantic", "orjson"):
+        print(
+            f"{name:10} {result[name]['cpu_ms_per_10k_rows_median']:9.1f} ms / 10k rows"
+        )
+    print(f"speedup    {result['speedup_median']:9.2f}x")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+起動時間の計測（import から最初のリクエストまで）
+
+新しいプロセスで app.main を import し、lifespan の開始、DBを使わない最初のリクエスト、
+DBを使う最初のリクエスト（存在しないユーザーでのログイン）までの経過時間を
+--repeat 回計測して中央値を出力します。Python 自体の起動時間は含みません。
+
+--create-all を指定すると、以前の起動処理（import 時の Base.metadata.create_all）を
+再現して計測するため、変更前後を同じコミットで比較できます。
+テーブルは事前に alembic upgrade head で作成しておいてください。
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.startup --repeat 10 --output startup.json
+    python -m benchmarks.startup --repeat 10 --create-all
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+PHASES = ["import", "startup", "first_request", "first_db_request"]
+
+
+def child(create_all: bool) -> None:
+    """
+    計測対象のプロセス。各フェーズの完了時刻（import 開始からの秒数）を JSON で出力します。
+    """
+    started = time.perf_counter()
+    import app.main
+
+    if create_all:
+        from app import database
+
+        database.Base.metadata.create_all(bind=database.get_engine())
+    timings = {"import": time.perf_counter() - started}
+
+    from fastapi.testclient import TestClient
+
+    with TestClient(app.main.app) as client:
+        timings["startup"] = time.perf_counter() - started
+        # 認証ヘッダーがないためDBに接続せずに 401 を返す
+        client.get("/auth/me")
+        timings["first_request"] = time.perf_counter() - started
+        # ユーザーの検索でDBに接続する（コネクションの確立を含む）
+        client.post(
+            "/auth/login/",
+            data={"username": "startup-benchmark@example.invalid", "password": "x"},
+        )
+        timings["first_db_request"] = time.perf_counter() - started
+    print(json.dumps(timings))
+
+
+def measure(create_all: bool) -> Dict[str, float]:
+    command = [sys.executable, "-m", "benchmarks.startup", "--child"]
+    if create_all:
+        command.append("--create-all")
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def median_ms(samples: List[float]) -> float:
+    samples = sorted(samples)
+    return round(samples[len(samples) // 2] * 1000, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="起動時間の計測")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--create-all",
+        action="store_true",
+        help="import 時に Base.metadata.create_all を実行する（変更前の起動処理）",
+    )
+    parser.add_argument("--output", help="結果をJSONで保存するファイル")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.create_all)
+        return
+    if args.repeat < 1:
+        parser.error("--repeat には正の値を指定してください")
+
+    runs = [measure(args.create_all) for _ in range(args.repeat)]
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "create_all": args.create_all,
+        "median_ms": {
+            phase: median_ms([run[phase] for run in runs]) for phase in PHASES
+        },
+    }
+    for phase in PHASES:
+        print(f"{phase:18} {result['median_ms'][phase]:9.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
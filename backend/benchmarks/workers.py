@@ -0,0 +1,150 @@
+"""
+ワーカー数ごとのスループット計測
+
+本番用のサーバー（gunicorn -c gunicorn.conf.py）をワーカー数を変えて起動し、
+それぞれに benchmarks.load と同じ負荷（MIX）をかけて、スループットが
+ワーカー数に比例してどこまで伸びるか（1ワーカーに対する倍率と効率）を計測します。
+事前に benchmarks.seed でデータを投入しておいてください。
+
+使い方（backend ディレクトリで実行）:
+    python -m benchmarks.workers --workers 1 2 4 8 --virtual-users 64 --duration 30 \\
+        --output results/workers.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.load import DEFAULT_PASSWORD, DEFAULT_PREFIX, git_commit, run
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SERVER_WORKERS": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        # 計測中にワーカーが入れ替わらないようにする
+        "SERVER_MAX_REQUESTS": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(server: subprocess.Popen, base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("サーバーが起動できませんでした")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{timeout} 秒以内にサーバーが起動しませんでした")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def measure(workers: int, args: argparse.Namespace) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(workers, args.port)
+    try:
+        wait_until_ready(server, base_url, args.startup_timeout)
+        load_args = argparse.Namespace(
+            base_url=base_url,
+            virtual_users=args.virtual_users,
+            seed_users=args.seed_users,
+            prefix=args.prefix,
+            password=args.password,
+            duration=args.duration,
+            warmup=args.warmup,
+            random_seed=args.random_seed,
+        )
+        result = asyncio.run(run(load_args))
+    finally:
+        stop_server(server)
+    return {"workers": workers, "total": result["total"], "routes": result["routes"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ワーカー数ごとのスループット計測")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, os.cpu_count() or 1}),
+        help="計測するワーカー数（既定は1とCPU数）",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--virtual-users", type=int, default=64)
+    parser.add_argument("--seed-users", type=int, default=200)
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--duration", type=float, default=30, help="計測秒数")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--output", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+    if min(args.workers) < 1 or args.virtual_users < 1:
+        parser.error("--workers と --virtual-users には正の値を指定してください")
+
+    runs = []
+    for workers in args.workers:
+        print(f"== {workers} workers")
+        runs.append(measure(workers, args))
+
+    baseline = runs[0]
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'speedup':>8}")
+    for result in runs:
+        total = result["total"]
+        # 最初に計測したワーカー数に対する倍率と、ワーカー数あたりの効率
+        result["speedup"] = round(
+            total["throughput"] / baseline["total"]["throughput"], 2
+        )
+        result["efficiency"] = round(
+            result["speedup"] * baseline["workers"] / result["workers"], 2
+        )
+        print(
+            f"{result['workers']:7d} {total['throughput']:9.1f} "
+            f"{total['p50_ms']:9.1f} {total['p99_ms']:9.1f} {result['speedup']:7.2f}x"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "cpu_count": os.cpu_count(),
+                    "virtual_users": args.virtual_users,
+                    "duration_seconds": args.duration,
+                    "runs": runs,
+                },
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+
+
+if __name__ == "__main__":
+    main()
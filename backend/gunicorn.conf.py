@@ -0,0 +1,66 @@
+"""
+本番用のサーバー設定（gunicorn + uvicorn のワーカー）
+
+    gunicorn -c gunicorn.conf.py
+
+- SERVER_WORKERS 個のワーカープロセスで処理します（既定はCPU数）。
+- アプリはフォーク前に親プロセスで読み込み（preload）、各ワーカーで共有します。
+  SQLAlchemy のエンジンはフォーク後に破棄し、ワーカーごとに作り直します。
+- SERVER_MAX_REQUESTS 件（± SERVER_MAX_REQUESTS_JITTER）を処理したワーカーは、
+  処理中のリクエストを待ってから（最大 SERVER_GRACEFUL_TIMEOUT_SECONDS 秒）入れ替えます。
+- 複数ワーカーの場合、実施予定タスクのインメモリインデックスは既定で無効にします
+  （DUE_TASK_INDEX_TTL_SECONDS を指定した場合はその値を使います）。
+- 複数ワーカーの場合、ワーカーごとのレスポンスキャッシュ（memory）も既定で無効にします
+  （RESPONSE_CACHE_TTL_SECONDS を指定した場合と、redis を使う場合はその設定を使います）。
+- 複数ワーカーの場合、メンバーシップとユーザー情報のキャッシュも既定で無効にします
+  （MEMBERSHIP_CACHE_TTL_SECONDS・USER_CACHE_TTL_SECONDS を指定した場合はその値を使います）。
+"""
+
+import os
+
+from app.database import reset_engines_after_fork
+from app.settings import get_settings
+
+settings = get_settings()
+
+wsgi_app = "app.main:app"
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = max(settings.server_workers, 1)
+preload_app = True
+max_requests = settings.server_max_requests
+max_requests_jitter = settings.server_max_requests_jitter
+graceful_timeout = settings.server_graceful_timeout_seconds
+accesslog = "-"
+
+# bcrypt のスレッド数は既定でCPU数のため、ワーカー数で分けてCPUを取り合わないようにする
+if "PASSWORD_HASH_WORKERS" not in os.environ:
+    settings.password_hash_workers = max((os.cpu_count() or 1) // workers, 1)
+
+# 実施予定タスクのインデックスはワーカーごとのため、他のワーカーでの更新が最大で
+# DUE_TASK_INDEX_TTL_SECONDS の間反映されない。複数ワーカーではSQLで取得する
+if workers > 1 and "DUE_TASK_INDEX_TTL_SECONDS" not in os.environ:
+    settings.due_task_index_ttl_seconds = 0
+
+# memory のレスポンスキャッシュもワーカーごとのため、更新したワーカー以外では
+# 最大で RESPONSE_CACHE_TTL_SECONDS の間古い一覧を返し続ける。複数ワーカーでは redis を使う
+if (
+    workers > 1
+    and settings.response_cache_backend == "memory"
+    and "RESPONSE_CACHE_TTL_SECONDS" not in os.environ
+):
+    settings.response_cache_ttl_seconds = 0
+
+# メンバーシップのキャッシュはワーカーごとのため、メンバーから外したユーザーが他のワーカーでは
+# 最大で MEMBERSHIP_CACHE_TTL_SECONDS の間プロジェクトを参照できてしまう。複数ワーカーでは無効にする
+if workers > 1 and "MEMBERSHIP_CACHE_TTL_SECONDS" not in os.environ:
+    settings.membership_cache_ttl_seconds = 0
+
+# ユーザー情報のキャッシュも同様に、プロフィールの変更が他のワーカーでは最大で
+# USER_CACHE_TTL_SECONDS の間反映されないため、複数ワーカーでは無効にする
+if workers > 1 and "USER_CACHE_TTL_SECONDS" not in os.environ:
+    settings.user_cache_ttl_seconds = 0
+
+
+def post_fork(server, worker):
+    reset_engines_after_fork()
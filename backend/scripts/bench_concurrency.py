@@ -0,0 +1,127 @@
+"""
+同時接続数ごとのスループット計測
+
+起動済みのAPIサーバー（uvicorn 1ワーカー）に対して、指定した同時接続数で
+エンドポイントへリクエストを送り続け、スループットとレイテンシを計測します。
+同期エンドポイントでは AnyIO のスレッドプール（既定40スレッド）が上限となるため、
+同時接続数を40より大きくしてもスループットが伸びるかどうかで非同期化の効果を確認できます。
+
+使い方:
+    uvicorn app.main:app --workers 1
+    python scripts/bench_concurrency.py --email user@example.com --password secret \\
+        --path /projects/1/executions/ --concurrency 10 40 80 160
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        "/auth/login/", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    path: str,
+    headers: dict[str, str],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    """
+    concurrency 個のワーカーで duration 秒間リクエストを送り続けます。
+    """
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "latency_p95_ms": (
+            latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None
+        ),
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    limits = httpx.Limits(
+        max_connections=max(args.concurrency), max_keepalive_connections=None
+    )
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=60
+    ) as client:
+        token = args.token or await login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # 接続の確立やキャッシュの準備が計測結果に影響しないよう事前に送っておく
+        await run_level(client, args.path, headers, max(args.concurrency), 1)
+
+        results = []
+        for concurrency in args.concurrency:
+            result = await run_level(
+                client, args.path, headers, concurrency, args.duration
+            )
+            print(
+                f"concurrency={concurrency:4d} "
+                f"throughput={result['throughput']:8.1f} req/s "
+                f"p50={result['latency_p50_ms']:7.1f} ms "
+                f"p95={result['latency_p95_ms']:7.1f} ms "
+                f"errors={result['errors']}"
+            )
+            results.append(result)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="同時接続数ごとのスループット計測")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", required=True, help="計測するGETエンドポイント")
+    parser.add_argument("--email", help="ログインに使うユーザーのメールアドレス")
+    parser.add_argument("--password", help="ログインに使うユーザーのパスワード")
+    parser.add_argument("--token", help="ログインせずに使うアクセストークン")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 40, 80, 160, 320]
+    )
+    parser.add_argument("--duration", type=float, default=10, help="各段階の計測秒数")
+    parser.add_argument("--output", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+    if not args.token and not (args.email and args.password):
+        parser.error("--token または --email と --password を指定してください")
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ sys.path.append(parent_dir)
 from sqlalchemy import text  # noqa: E402
 from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
 
-from app import database, models  # noqa: E402
+from app import database  # noqa: E402
 from app.settings import settings  # noqa: E402
 
 
@@ -30,8 +30,9 @@ def test_connection():
                 f"Connecting to Development (Local PostgreSQL) Database: {settings.local_database_url}"
             )
 
-        # データベースに接続し、テーブルが存在するか確認
-        models.Base.metadata.create_all(bind=database.engine)
+        # データベースに接続できるか確認（テーブルは Alembic のマイグレーションで作成する）
+        with database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
         print("Database connection successful.")
 
         # 接続しているデータベースの名前を取得
@@ -0,0 +1,406 @@
+"""
+クエリプランの回帰チェック
+
+大量の合成データを投入した状態で各ルーターのエンドポイントを呼び出し、
+発行されたSQLの EXPLAIN を取得して、投入したテーブルに対する
+シーケンシャルスキャン（Seq Scan）が含まれていないことを確認します。
+エンドポイントが成功（2xx）しなかった場合と、SQLが1つも発行されなかった場合も失敗とします。
+確認しないエンドポイントとその理由は EXCLUDED_ENDPOINTS にまとめています。
+
+データの投入から確認までを1つのトランザクション内で行い、最後にロールバックするため、
+接続先のデータベースにデータは残りません。
+
+使い方:
+    python scripts/explain_check.py --projects 500 --tasks 20 --executions 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# スクリプトの現在のディレクトリを取得
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 親ディレクトリ（プロジェクトのルート）を取得
+parent_dir = os.path.dirname(current_dir)
+# 親ディレクトリをPythonのモジュール検索パスに追加
+sys.path.append(parent_dir)
+
+# キャッシュとインメモリインデックスから返されるとSQLが発行されず確認できないため無効化する
+os.environ["RESPONSE_CACHE_TTL_SECONDS"] = "0"
+os.environ["DUE_TASK_INDEX_TTL_SECONDS"] = "0"
+os.environ["MEMBERSHIP_CACHE_TTL_SECONDS"] = "0"
+os.environ["USER_CACHE_TTL_SECONDS"] = "0"
+# 登録・ログインのパスワードのハッシュ化はプランに関係しないため最小のコストにする
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession  # noqa: E402
+
+from app import database, models, schemas, utils  # noqa: E402
+from app.main import app  # noqa: E402
+from app.read_replica import get_cache_fill_db, get_read_db  # noqa: E402
+
+# シーケンシャルスキャンを許容しないテーブル
+WATCHED_TABLES = {"users", "projects", "project_members", "tasks", "task_executions"}
+
+# 確認しないエンドポイントとその理由
+EXCLUDED_ENDPOINTS = {
+    "GET /users/": (
+        "メールアドレスの部分一致（ilike '%...%'）と全件取得のため、"
+        "btree インデックスを使えず Seq Scan になる"
+    ),
+    "GET /auth/me": "get_current_user を差し替えているため SQL が発行されない",
+    "PUT /auth/change-password": (
+        "合成データのユーザーはパスワードを検証できない"
+        "（発行される SQL は update-profile と同じ主キーでの取得）"
+    ),
+    "GET /healthz, GET /readyz, GET /metrics": "監視対象のテーブルを参照しない",
+}
+
+SEED_STATEMENTS = [
+    # ユーザー
+    """
+    INSERT INTO users (username, email, password_hash, created_at, updated_at)
+    SELECT 'explain_user_' || g, 'explain-' || g || '@example.com', 'x', now(), now()
+    FROM generate_series(1, :users) AS g
+    """,
+    # プロジェクト（オーナーはユーザーを順番に割り当て）
+    """
+    INSERT INTO projects (name, owner_id, created_at, updated_at)
+    SELECT 'explain_project_' || g, u.id, now(), now()
+    FROM generate_series(1, :projects) AS g
+    JOIN users AS u ON u.email = 'explain-' || (((g - 1) % :users) + 1) || '@example.com'
+    """,
+    # プロジェクトメンバー（先頭のメンバーがオーナーかつAdmin）
+    """
+    INSERT INTO project_members (project_id, user_id, role, created_at)
+    SELECT p.id, u.id, CASE WHEN m = 1 THEN 'Admin' ELSE 'member' END, now()
+    FROM projects AS p
+    CROSS JOIN generate_series(1, :members) AS m
+    JOIN users AS u ON u.email = 'explain-'
+        || (((substring(p.name FROM 'explain_project_([0-9]+)')::int + m - 2) % :users) + 1)
+        || '@example.com'
+    WHERE p.name LIKE 'explain\\_project\\_%'
+    """,
+    # タスク
+    """
+    INSERT INTO tasks (
+        project_id, category, task_name, frequency, next_due_at, created_at, updated_at
+    )
+    SELECT p.id, 'category_' || (t % 5), 'task_' || t, (t % 14) + 1, now(), now(), now()
+    FROM projects AS p
+    CROSS JOIN generate_series(1, :tasks) AS t
+    WHERE p.name LIKE 'explain\\_project\\_%'
+    """,
+    # 実行履歴（1日ずつ過去に遡って登録）
+    """
+    INSERT INTO task_executions (task_id, user_id, execution_date, created_at)
+    SELECT t.id, p.owner_id, now() - e * INTERVAL '1 day', now()
+    FROM tasks AS t
+    JOIN projects AS p ON p.id = t.project_id
+    CROSS JOIN generate_series(1, :executions) AS e
+    WHERE p.name LIKE 'explain\\_project\\_%'
+    """,
+    # 最新実行日時と次回実施予定日時
+    """
+    UPDATE tasks
+    SET last_execution_at = latest.last_execution,
+        next_due_at = latest.last_execution + tasks.frequency * INTERVAL '1 day'
+    FROM (
+        SELECT task_id, max(execution_date) AS last_execution
+        FROM task_executions
+        GROUP BY task_id
+    ) AS latest
+    WHERE tasks.id = latest.task_id
+    """,
+]
+
+
+async def seed(connection: AsyncConnection, args: argparse.Namespace) -> None:
+    """
+    合成データを投入し、プランナーの統計情報を更新します。
+    """
+    params = {
+        "users": args.users,
+        "projects": args.projects,
+        "members": args.members,
+        "tasks": args.tasks,
+        "executions": args.executions,
+    }
+    for statement in SEED_STATEMENTS:
+        await connection.execute(text(statement), params)
+    for table in sorted(WATCHED_TABLES):
+        await connection.exec_driver_sql(f"ANALYZE {table}")
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    """
+    プランツリーから監視対象テーブルに対する Seq Scan を探します。
+    """
+    found = []
+    if (
+        plan.get("Node Type") == "Seq Scan"
+        and plan.get("Relation Name") in WATCHED_TABLES
+    ):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+async def run(args: argparse.Namespace) -> int:
+    failures = 0
+    async with database.async_engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            print("Seeding synthetic data...")
+            await seed(connection, args)
+
+            # エンドポイント内の commit はセーブポイントに対して行われる
+            db = AsyncSession(
+                bind=connection,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            )
+
+            project_id, owner_id = (
+                await connection.execute(
+                    text(
+                        "SELECT id, owner_id FROM projects "
+                        "WHERE name = 'explain_project_1'"
+                    )
+                )
+            ).one()
+            task_id = (
+                await connection.execute(
+                    text("SELECT min(id) FROM tasks WHERE project_id = :project_id"),
+                    {"project_id": project_id},
+                )
+            ).scalar_one()
+            execution_id = (
+                await connection.execute(
+                    text(
+                        "SELECT min(id) FROM task_executions WHERE task_id = :task_id"
+                    ),
+                    {"task_id": task_id},
+                )
+            ).scalar_one()
+            # プロジェクトに参加していないユーザーと、Admin 以外のメンバー
+            other_user_id = (
+                await connection.execute(
+                    text(
+                        "SELECT min(id) FROM users WHERE id NOT IN "
+                        "(SELECT user_id FROM project_members "
+                        "WHERE project_id = :project_id)"
+                    ),
+                    {"project_id": project_id},
+                )
+            ).scalar_one()
+            member_id = (
+                await connection.execute(
+                    text(
+                        "SELECT min(id) FROM project_members "
+                        "WHERE project_id = :project_id AND role = 'member'"
+                    ),
+                    {"project_id": project_id},
+                )
+            ).scalar_one()
+            current_user = schemas.CurrentUser.model_validate(
+                await db.get(models.User, owner_id)
+            )
+
+            async def override_get_async_db():
+                yield db
+
+            # 読み込み用のセッションもレプリカを使わず、同じトランザクションで処理する
+            for dependency in (database.get_async_db, get_read_db, get_cache_fill_db):
+                app.dependency_overrides[dependency] = override_get_async_db
+            app.dependency_overrides[utils.get_current_user] = lambda: current_user
+
+            base = f"/projects/{project_id}"
+            task_body = {"category": "explain", "task_name": "task", "frequency": 1}
+            # 直前のレスポンスで発行されたリフレッシュトークン（refresh・logout で使う）
+            tokens: dict[str, str] = {}
+
+            def refresh_body() -> dict:
+                return {"json": {"refresh_token": tokens["refresh_token"]}}
+
+            # (メソッド, URL, httpx のリクエストの引数またはそれを返す関数)
+            requests = [
+                (
+                    "POST",
+                    "/auth/register/",
+                    {
+                        "json": {
+                            "username": "explain_new",
+                            "email": "explain-new@example.com",
+                            "password": "explain-password",
+                        }
+                    },
+                ),
+                (
+                    "POST",
+                    "/auth/login/",
+                    {
+                        "data": {
+                            "username": "explain-new@example.com",
+                            "password": "explain-password",
+                        }
+                    },
+                ),
+                ("POST", "/auth/refresh/", refresh_body),
+                ("POST", "/auth/logout/", refresh_body),
+                ("PUT", "/auth/update-profile", {"json": {"username": "explain"}}),
+                ("GET", f"/users/{owner_id}", {}),
+                ("GET", "/projects/", {}),
+                ("GET", base, {}),
+                (
+                    "PUT",
+                    base,
+                    {"json": {"name": "explain_project_1", "description": "d"}},
+                ),
+                ("POST", "/projects/", {"json": {"name": "explain_new_project"}}),
+                ("GET", f"{base}/members/", {}),
+                (
+                    "POST",
+                    f"{base}/members/",
+                    {"json": {"user_id": other_user_id, "role": "member"}},
+                ),
+                ("PUT", f"{base}/members/{member_id}", {"json": {"role": "member"}}),
+                ("DELETE", f"{base}/members/{member_id}", {}),
+                ("GET", f"{base}/tasks/", {}),
+                ("GET", f"{base}/tasks/{task_id}", {}),
+                ("POST", f"{base}/tasks/", {"json": task_body}),
+                ("PUT", f"{base}/tasks/{task_id}", {"json": task_body}),
+                (
+                    "POST",
+                    f"{base}/tasks/upload",
+                    {
+                        "files": {
+                            "file": (
+                                "tasks.csv",
+                                b"category,task_name,frequency\nexplain,upload,3\n",
+                                "text/csv",
+                            )
+                        }
+                    },
+                ),
+                ("GET", f"{base}/tasks/due/", {}),
+                ("GET", f"{base}/tasks/due/?filter_type=week", {}),
+                ("GET", f"{base}/tasks/due/?filter_type=month", {}),
+                ("GET", "/tasks/due/", {}),
+                ("GET", "/tasks/due/?filter_type=week", {}),
+                ("GET", "/tasks/due/?filter_type=month", {}),
+                ("GET", f"{base}/executions/", {}),
+                (
+                    "GET",
+                    f"{base}/executions/?startDate=2020-01-01&endDate=2030-12-31",
+                    {},
+                ),
+                (
+                    "GET",
+                    f"{base}/executions/summary?startDate=2020-01-01&endDate=2030-12-31",
+                    {},
+                ),
+                ("GET", f"{base}/executions/{execution_id}", {}),
+                ("POST", f"{base}/executions/{task_id}", {}),
+                (
+                    "POST",
+                    f"{base}/executions/batch",
+                    {"json": {"items": [{"task_id": task_id, "user_id": owner_id}]}},
+                ),
+                (
+                    "PUT",
+                    f"{base}/executions/{execution_id}",
+                    {
+                        "json": {
+                            "user_id": owner_id,
+                            "execution_date": "2020-01-01T00:00:00.000Z",
+                        }
+                    },
+                ),
+                ("DELETE", f"{base}/executions/{execution_id}", {}),
+                ("DELETE", f"{base}/tasks/{task_id}", {}),
+                # 他の確認で使うデータも削除されるため最後に行う
+                ("DELETE", base, {}),
+            ]
+
+            captured: list[tuple[str, object]] = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                keyword = statement.lstrip().split(None, 1)[0].upper()
+                if keyword in ("SELECT", "UPDATE", "DELETE"):
+                    captured.append((statement, parameters))
+
+            sync_connection = connection.sync_connection
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://explain"
+            ) as client:
+                for method, url, options in requests:
+                    if callable(options):
+                        options = options()
+                    captured.clear()
+                    event.listen(sync_connection, "before_cursor_execute", capture)
+                    try:
+                        response = await client.request(method, url, **options)
+                    finally:
+                        event.remove(sync_connection, "before_cursor_execute", capture)
+                    if response.is_success and "refresh_token" in response.text:
+                        tokens["refresh_token"] = response.json()["refresh_token"]
+
+                    print(f"{method} {url} -> {response.status_code}")
+                    if not response.is_success:
+                        failures += 1
+                        print(f"  NG: unexpected status {response.status_code}")
+                        print("    " + response.text[:200])
+                    if not captured:
+                        # セッションの差し替えが効かず別の接続で実行された場合など
+                        failures += 1
+                        print("  NG: no statements were captured")
+                    for statement, parameters in captured:
+                        plan = (
+                            await connection.exec_driver_sql(
+                                "EXPLAIN (FORMAT JSON) " + statement, parameters
+                            )
+                        ).scalar_one()
+                        if isinstance(plan, str):
+                            plan = json.loads(plan)
+                        seq_scans = find_seq_scans(plan[0]["Plan"])
+                        if seq_scans:
+                            failures += 1
+                            print(f"  NG: Seq Scan on {', '.join(seq_scans)}")
+                            print("    " + " ".join(statement.split()))
+                        else:
+                            print("  OK: " + " ".join(statement.split())[:100])
+        finally:
+            app.dependency_overrides.clear()
+            await transaction.rollback()
+
+    if failures:
+        print(f"{failures} check(s) failed.")
+        return 1
+    print("All statements use index access paths.")
+    for endpoint, reason in EXCLUDED_ENDPOINTS.items():
+        print(f"  excluded: {endpoint} ({reason})")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="EXPLAINによるクエリプランの回帰チェック"
+    )
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--executions", type=int, default=50)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
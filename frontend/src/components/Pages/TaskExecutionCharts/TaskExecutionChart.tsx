@@ -4,7 +4,7 @@ import React, { useEffect, useState } from 'react';
 import { PieChart, Pie, Cell, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { useParams } from 'react-router-dom';
 import api from '../../../services/api';
-import { TaskExecutionResponse } from '../../../types';
+import { TaskExecutionSummaryResponse } from '../../../types';
 import { toast } from 'react-toastify';
 import LoadingSpinner from '../../Atoms/LoadingSpinner';
 import ErrorMessage from '../../Atoms/ErrorMessage';
@@ -95,8 +95,9 @@ const TaskExecutionChart: React.FC<TaskExecutionChartProps> = () => {
     setLoading(true);
     setError('');
     try {
-      const response = await api.get<TaskExecutionResponse[]>(
-        `/projects/${projectId}/executions`,
+      // 集計はサーバー側で行う
+      const response = await api.get<TaskExecutionSummaryResponse>(
+        `/projects/${projectId}/executions/summary`,
         {
           params: {
             startDate,
@@ -105,23 +106,9 @@ const TaskExecutionChart: React.FC<TaskExecutionChartProps> = () => {
         }
       );
 
-      const executions = response.data;
-
-      // ユーザーごとのタスク数を集計
-      const taskCountMap: { [username: string]: number } = {};
-
-      executions.forEach((execution) => {
-        const username = execution.user_name;
-        if (taskCountMap[username]) {
-          taskCountMap[username]++;
-        } else {
-          taskCountMap[username] = 1;
-        }
-      });
-
-      const aggregatedData: TaskCountPerUser[] = Object.keys(taskCountMap).map((username) => ({
-        username,
-        taskCount: taskCountMap[username],
+      const aggregatedData: TaskCountPerUser[] = response.data.by_user.map((row) => ({
+        username: row.user_name,
+        taskCount: row.count,
       }));
 
       setTaskData(aggregatedData);
@@ -9,13 +9,14 @@ import useResponsiveIconSize from '../../../hooks/useResponsiveIconSize';
 import { TaskExecutionResponse } from '../../../types';
 import { ActionsType } from '../../../types/atoms';
 import TableComponent from '../../Organisms/TableComponent';
+import Button from '../../Atoms/Button';
 
 const TaskExecutionList: React.FC = () => {
   const { projectId } = useParams<{ projectId: string }>();
   const navigate = useNavigate();
 
   // カスタムフックを使用してタスク実行履歴の状態を管理
-  const { executions, loading, error, deleteExecution } = useExecutions(projectId);
+  const { executions, loading, error, deleteExecution, hasMore, loadMore } = useExecutions(projectId);
   const iconSize = useResponsiveIconSize();
   /**
    * タスク実行履歴削除ハンドラー
@@ -81,6 +82,16 @@ const TaskExecutionList: React.FC = () => {
             ) : (
             <p className="text-center text-gray-500">タスクが存在しません。</p>
           )}
+          {hasMore && !loading && (
+            <div className="flex justify-center py-2">
+              <Button
+                onClick={loadMore}
+                className="px-4 py-2 text-green-600 border border-green-500 rounded hover:bg-green-50"
+              >
+                さらに読み込む
+              </Button>
+            </div>
+          )}
       </div>
   );
 };
@@ -8,7 +8,7 @@ import { toast } from 'react-toastify';
 import ErrorMessage from '../../Atoms/ErrorMessage';
 import LoadingSpinner from '../../Atoms/LoadingSpinner';
 import TableComponent from '../../Organisms/TableComponent';
-import { TaskResponse } from '../../../types'; // IconName と Action をインポート
+import { TaskImportResponse, TaskResponse } from '../../../types'; // IconName と Action をインポート
 import { ActionsType } from '../../../types/atoms';
 import IconButton from '../../Molecules/IconButton';
 import useResponsiveIconSize from '../../../hooks/useResponsiveIconSize';
@@ -51,12 +51,20 @@ const TaskList: React.FC = () => {
     formData.append('file', file);
 
     try {
-      await api.post(`/projects/${projectId}/tasks/upload`, formData, {
+      const response = await api.post<TaskImportResponse>(`/projects/${projectId}/tasks/upload`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
-      toast.success('CSVが正常にアップロードされました。');
+      const { created, failed, errors } = response.data;
+      toast.success(`CSVから${created}件のタスクを登録しました。`);
+      if (failed > 0) {
+        const details = errors
+          .slice(0, 5)
+          .map((error) => `${error.line}行目: ${error.message}`)
+          .join(' / ');
+        toast.error(`${failed}件の行を登録できませんでした。${details}`);
+      }
       fetchTasks(); // タスク一覧を再取得して更新
     } catch (error) {
       toast.error('CSVのアップロードに失敗しました。');
@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import api from '../services/api';
-import { TaskExecutionResponse } from '../types';
+import { TaskExecutionPageResponse, TaskExecutionResponse } from '../types';
 import { toast } from 'react-toastify';
 import { toJstDateFormat } from '../utils/exchangeTimeZoneDate';
 
@@ -11,17 +11,20 @@ import { toJstDateFormat } from '../utils/exchangeTimeZoneDate';
  * 指定されたプロジェクトIDのタスク実行履歴を取得し、削除を管理します。
  *
  * @param projectId - プロジェクトのID
- * @returns executions, loading, error, deleteExecution
+ * @returns executions, loading, error, deleteExecution, hasMore, loadMore
  */
 const useTaskExecutions = (projectId: string | undefined) => {
   const [executions, setExecutions] = useState<TaskExecutionResponse[]>([]);
   const [loading, setLoading] = useState<boolean>(false);
   const [error, setError] = useState<string>('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   /**
-   * タスク実行履歴の取得
+   * タスク実行履歴の取得（カーソルを指定した場合は続きのページを追加）
+   *
+   * @param cursor - 前ページの next_cursor
    */
-  const fetchExecutions = async () => {
+  const fetchExecutions = async (cursor?: string) => {
     if (!projectId) {
       setError('プロジェクトIDが不足しています。');
       toast.error('プロジェクトIDが不足しています。');
@@ -29,12 +32,17 @@ const useTaskExecutions = (projectId: string | undefined) => {
     }
     setLoading(true);
     try {
-        const response = await api.get<TaskExecutionResponse[]>(`/projects/${projectId}/executions/`);
-        const formattedExecutions = response.data.map(execution => ({
+        const response = await api.get<TaskExecutionPageResponse>(`/projects/${projectId}/executions/`, {
+          params: cursor ? { cursor } : undefined,
+        });
+        const formattedExecutions = response.data.items.map(execution => ({
             ...execution,
             execution_date: toJstDateFormat(execution.execution_date, "MM-dd"),
         }));
-        setExecutions(formattedExecutions);
+        setExecutions((prevExecutions) =>
+          cursor ? [...prevExecutions, ...formattedExecutions] : formattedExecutions
+        );
+        setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError('タスク実行履歴の取得に失敗しました。');
       toast.error('タスク実行履歴の取得に失敗しました。');
@@ -64,12 +72,21 @@ const useTaskExecutions = (projectId: string | undefined) => {
     }
   };
 
+  /**
+   * 次のページのタスク実行履歴を読み込む
+   */
+  const loadMore = async () => {
+    if (nextCursor) {
+      await fetchExecutions(nextCursor);
+    }
+  };
+
   useEffect(() => {
     fetchExecutions();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [projectId]);
 
-  return { executions, loading, error, deleteExecution };
+  return { executions, loading, error, deleteExecution, hasMore: nextCursor !== null, loadMore };
 };
 
 export default useTaskExecutions;
@@ -63,6 +63,17 @@ export interface TaskResponse {
   updated_at: string
 }
 
+export interface TaskImportError {
+  line: number;
+  message: string;
+}
+
+export interface TaskImportResponse {
+  created: number;
+  failed: number;
+  errors: TaskImportError[];
+}
+
 export interface TaskExecutionCreate {
   execution_date?: string; // ISO8601形式の文字列
 }
@@ -82,3 +93,25 @@ export interface TaskExecutionResponse {
   execution_date: string; // ISO形式の日付
   created_at: string;
 }
+
+export interface TaskExecutionPageResponse {
+  items: TaskExecutionResponse[];
+  next_cursor: string | null;
+}
+
+export interface TaskExecutionCountByUser {
+  user_id: number;
+  user_name: string;
+  count: number;
+}
+
+export interface TaskExecutionCountByCategory {
+  category: string;
+  count: number;
+}
+
+export interface TaskExecutionSummaryResponse {
+  total: number;
+  by_user: TaskExecutionCountByUser[];
+  by_category: TaskExecutionCountByCategory[];
+}
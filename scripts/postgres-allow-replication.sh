@@ -0,0 +1,6 @@
+#!/bin/bash
+# docker compose の db（プライマリ）の初期化時に実行され、
+# db-replica（読み取り専用のレプリカ）からのストリーミングレプリケーションの接続を許可する
+# （データベースのボリュームが空の場合のみ実行されるため、既存の環境では docker compose down -v が必要）
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"